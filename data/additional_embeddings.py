@@ -1,8 +1,8 @@
 import os
 from utils.neo4j_python_connection import Neo4jConnection
+from utils.schema import ensure_schema
+from utils.embedding_client import embed_texts
 import pandas as pd
-from openai import OpenAI 
-from tqdm import tqdm
 
 #Initiate Neo4j-database connection
 conn = Neo4jConnection(uri=os.getenv('NEO4J_url'), 
@@ -15,13 +15,16 @@ read_db = "swissparlgraph2"
 #Define database for writing new vector embeddings
 write_db = "vector"
 
+#Embedding model of the sentence chunks
+embedding_model = 'text-embedding-ada-002'
+
 #Function for reading all text nodes
 def read_write_text_nodes(db_read, db_write):
     query = '''
             MATCH (t:Text)
             RETURN t.Text_ID, t.ID, t.info, t.Name, t.Parent_Label, t.Parent_Name, t.Quelle, t.Titel
             '''       
-    result = conn.query(query, db=db_read)
+    result = conn.query(query, db=db_read, full_scan=True)
     df = pd.DataFrame(result, columns=["Text_ID", "KG_ID", "info", "Name", "Parent_Label", "Parent_Name", "Quelle", "Titel"])
 
     query = '''
@@ -36,15 +39,7 @@ def read_write_text_nodes(db_read, db_write):
             t.Titel = row.Titel
             RETURN count(t) as total
             '''
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
-
-#Function for returning OpenAI embeddings
-def get_embedding(text_to_embbed):
-    
-    client = OpenAI()
-    text = text_to_embbed
-    return client.embeddings.create(input = [text],
-                                	model='text-embedding-ada-002').data[0].embedding
+    return conn.write_batches(query, df, db=db_write)
 
 #Function for loading and processing text nodes
 def load_process_texts(db):
@@ -53,18 +48,17 @@ def load_process_texts(db):
             WHERE t.info IS NOT NULL
             RETURN t.Text_ID, t.info
             '''
-    result = conn.query_values(query, db=db)
+    result = conn.query_values(query, db=db, full_scan=True)
     df = pd.DataFrame(result, 
                       columns=["Text_ID", "info"])
 
-    tqdm.pandas()
     df['info'] = df['info'].str.split(r'\.\s(?=[A-Z])', regex=True)
     df = df.explode("info")
     df = df[df['info'] != ""]
     processed_texts = df.reset_index(drop=True)
     processed_texts["index"] = processed_texts.index
 
-    processed_texts["embedding"] = processed_texts["info"].astype(str).progress_apply(get_embedding)
+    processed_texts["embedding"] = embed_texts(processed_texts["info"].astype(str).tolist(), embedding_model)
 
     return processed_texts.to_csv("embeddings.csv", index=False)
 
@@ -85,6 +79,8 @@ def store_nodes_in_neo4j(db):
 
 
 #Reading all text nodes, store in new database and add vector embeddings
+ensure_schema(conn, write_db, labels=['Text', 'Chunk'])
+
 read_write_text_nodes(read_db, write_db)
 
 load_process_texts(write_db)
@@ -0,0 +1,484 @@
+import parlament_class as pc
+import integration_class as di
+from utils.odata_fetch import fetch_in_chunks
+
+#Functions writing the tables of the Swiss Parliament Webservices as import files for neo4j-admin,
+#mirroring the entities, relationships and properties stored by parlament_class.py
+
+#Relationship types of the roles of members of parliament in parlament_class.BusinessRole
+BUSINESS_ROLE_TYPES = {7: 'HAT_EINGEREICHT', 2: 'IST_SPRECHER_FÜR', 3: 'HAT_MITUNTERZEICHNET',
+                       1: 'HAT_BEKÄMPFT', 4: 'HAT_ÜBERNOMMEN'}
+
+#IDs of the collected nodes of an ID space, for the tables parlament_class.py filters by the nodes in the database
+def collected_ids(bulk, id_space):
+    return [int(value) if value.lstrip('-').isdigit() else value for value in bulk.ids.get(id_space, ())]
+
+#Members of parliament with their parties, councils, cantons and parliamentary groups
+def export_membercouncil(bulk, table, **kwargs):
+    """Loads table and writes the same entities, relationships and properties as
+    parlament_class.membercouncil to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = pc.load_table(table, columns=pc.MEMBERCOUNCIL_COLUMNS, **kwargs)
+    df['Name'] = df['FirstName'] + " " + df['LastName']
+    df['Labels'] = df['Council'].map(lambda council: 'Parlamentarier' if council < 3 else '')
+    bulk.nodes('Person', df, key=('Personennummer', 'ID'),
+               properties={'Nachname': 'LastName', 'Vorname': 'FirstName', 'Name': 'Name',
+                           'Geburtsdatum': 'DateOfBirth', 'Geschlecht': 'GenderAsString',
+                           'Zivilstand': 'MartialStatusText', 'Aktiv': 'Active'},
+               types={'Geburtsdatum': 'date'}, extra_labels='Labels')
+
+    bulk.nodes('Partei', df, key=('Parteinummer', 'Party'),
+               properties={'Name': 'PartyName', 'Abkürzung': 'PartyAbbreviation'})
+    bulk.relationships('MITGLIED_VON', df, start=('Person', 'ID'), end=('Partei', 'Party'))
+
+    councils = df[df['Council'] != 98]
+    bulk.nodes('Rat', councils, key=('Ratnummer', 'Council'),
+               properties={'Name': 'CouncilName', 'Abkürzung': 'CouncilAbbreviation'})
+    bulk.relationships('MITGLIED_VON', councils, start=('Person', 'ID'), end=('Rat', 'Council'),
+                       properties={'Eintrittsdatum': 'DateJoining'}, types={'Eintrittsdatum': 'date'})
+
+    bulk.nodes('Kanton', df, key=('Kantonsnummer', 'Canton'),
+               properties={'Name': 'CantonName', 'Abkürzung': 'CantonAbbreviation'})
+    bulk.relationships('REPRÄSENTIERT', df, start=('Person', 'ID'), end=('Kanton', 'Canton'))
+
+    groups = df[df['ParlGroupNumber'] != 0]
+    bulk.nodes('Fraktion', groups, key=('Fraktionsnummer', 'ParlGroupNumber'),
+               properties={'Name': 'ParlGroupName', 'Abkürzung': 'ParlGroupAbbreviation'})
+    bulk.relationships('MITGLIED_VON', groups, start=('Person', 'ID'), end=('Fraktion', 'ParlGroupNumber'),
+                       properties={'Funktion': 'ParlGroupFunctionText'})
+    bulk.relationships('TEIL_VON', df, start=('Partei', 'Party'), end=('Fraktion', 'ParlGroupNumber'))
+    return print("MemberCouncil export finished")
+
+#Occupations of the members of parliament, stored on the collected persons
+def export_person_occupation(bulk, table, **kwargs):
+    """Loads table and writes the same properties as parlament_class.person_occupation
+    to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = pc.load_table(table, **kwargs)
+    bulk.nodes('Person', df, key=('Personennummer', 'PersonNumber'),
+               properties={'Berufsbezeichnung': 'OccupationName', 'Arbeitgeber': 'Employer',
+                            'Berufstitel': 'JobTitle'}, existing=True)
+    return print("PersonOccupation export finished")
+
+#Addresses of the members of parliament, stored on the collected persons
+def export_person_address(bulk, table, **kwargs):
+    """Loads table and writes the same properties as parlament_class.person_address
+    to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = pc.load_table(table, **kwargs)
+    bulk.nodes('Person', df, key=('Personennummer', 'PersonNumber'),
+               properties={'Adresse': 'AddressLine1', 'Gemeinde': 'City', 'Postleitzahl_Adresse': 'Postcode',
+                            'Adressentyp': 'AddressTypeName'}, existing=True)
+    return print("PersonAddress export finished")
+
+#Places of citizenship of the members of parliament, stored on the collected persons
+def export_citizenship(bulk, table, **kwargs):
+    """Loads table and writes the same properties as parlament_class.citizenship
+    to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = pc.load_table(table, **kwargs)
+    bulk.nodes('Person', df, key=('Personennummer', 'PersonNumber'),
+               properties={'Heimatort': 'City', 'Postleitzahl_Heimatort': 'PostCode'}, existing=True)
+    return print("Citizenship export finished")
+
+#Committees with the memberships of the members of parliament
+def export_member_committee(bulk, table, **kwargs):
+    """Loads table and writes the same entities, relationships and properties as
+    parlament_class.member_committee to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = pc.load_table(table, **kwargs)
+    bulk.nodes('Kommission', df, key=('Kommissionsnummer', 'CommitteeNumber'),
+               properties={'Name': 'CommitteeName', 'Typ': 'CommitteeTypeName', 'Abkürzung': 'Abbreviation'})
+    bulk.relationships('MITGLIED_VON', df, start=('Person', 'PersonNumber'), end=('Kommission', 'CommitteeNumber'),
+                       properties={'Funktion': 'CommitteeFunctionName'})
+    return print("MemberCommittee export finished")
+
+#Councils of the committees, joint committees (council 3) belong to both councils
+def export_committee(bulk, table, **kwargs):
+    """Loads table and writes the same relationships as parlament_class.committee
+    to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = pc.load_table(table, **kwargs)
+    df = df.assign(Council=df['Council'].map(lambda council: [1, 2] if council == 3 else [council])).explode('Council')
+    bulk.relationships('TEIL_VON', df, start=('Kommission', 'CommitteeNumber'), end=('Rat', 'Council'))
+    return print("Committee export finished")
+
+#Businesses with their submission sessions and topics
+def export_business(bulk, table, **kwargs):
+    """Loads table and writes the same entities, relationships and properties as
+    parlament_class.business to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = pc.load_table(table, columns=pc.BUSINESS_COLUMNS, **kwargs)
+    df_sub = pc.prepare_business_page(df)
+    bulk.nodes('Geschäft', df, key=('Geschäftsnummer', 'ID'),
+               properties={'Geschäftskurznummer': 'BusinessShortNumber', 'Geschäftstyp': 'BusinessTypeName',
+                           'Titel': 'Title', 'Beschreibung': 'Description',
+                           'Empfehlung_Bundesrat': 'FederalCouncilProposalText',
+                           'Status': 'BusinessStatusText', 'Zeitpunkt_Statusupdate': 'BusinessStatusDate',
+                           'Einreichungsdatum': 'SubmissionDate',
+                           'Legislationsnummer_Einreichung': 'SubmissionLegislativePeriod'},
+               types={'Zeitpunkt_Statusupdate': 'datetime', 'Einreichungsdatum': 'date'})
+
+    bulk.nodes('Session', df, key=('Sessionsnummer', 'SubmissionSession'))
+    bulk.relationships('EINGEREICHT_WÄHREND', df, start=('Geschäft', 'ID'), end=('Session', 'SubmissionSession'))
+
+    bulk.nodes('Thema', df_sub, key=('Name', 'TagNames'))
+    bulk.relationships('IST_TEIL_VON', df_sub, start=('Geschäft', 'ID'), end=('Thema', 'TagNames'))
+    return print("Business export finished")
+
+#Votes with their sessions and the businesses they treat
+def export_vote(bulk, table, **kwargs):
+    """Loads table and writes the same entities, relationships and properties as
+    parlament_class.vote to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = pc.load_table(table, columns=pc.VOTE_COLUMNS, **kwargs)
+    bulk.nodes('Abstimmung', df, key=('Abstimmungsnummer', 'RegistrationNumber'),
+               properties={'Geschäftsnummer': 'BusinessNumber', 'Geschäftskurznummer': 'BusinessShortNumber',
+                           'Geschäftstitel': 'BusinessTitle', 'Geltungsbereich': 'Subject',
+                           'Bedeutung_Ja': 'MeaningYes', 'Bedeutung_Nein': 'MeaningNo',
+                           'Zeitpunkt': 'VoteEndWithTimezone'},
+               types={'Zeitpunkt': 'datetime'})
+
+    bulk.nodes('Session', df, key=('Sessionsnummer', 'IdSession'), properties={'Name': 'SessionName'})
+    bulk.relationships('DURCHGEFÜHRT_WÄHREND', df, start=('Abstimmung', 'RegistrationNumber'),
+                       end=('Session', 'IdSession'))
+
+    bulk.nodes('Geschäft', df, key=('Geschäftsnummer', 'BusinessNumber'),
+               properties={'Geschäftskurznummer': 'BusinessShortNumber'})
+    bulk.relationships('BEHANDELT', df, start=('Abstimmung', 'RegistrationNumber'),
+                       end=('Geschäft', 'BusinessNumber'))
+    return print("Vote export finished")
+
+#Votings of the members of parliament, one relationship type per decision
+def export_voting(bulk, table, **kwargs):
+    """Loads table and writes the same relationships and properties as
+    parlament_class.voting to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = pc.load_table(table, columns=pc.VOTING_COLUMNS, **kwargs)
+    types = df['Decision'].clip(upper=3).map(pc.VOTING_TYPES)
+    for relationship, group in df.groupby(types, sort=False):
+        bulk.relationships(relationship, group, start=('Person', 'PersonNumber'),
+                           end=('Abstimmung', 'RegistrationNumber'), properties={'Entscheidung': 'DecisionText'})
+    return print("Voting export finished")
+
+#Roles of parliamentary groups, cantons, committees and members of parliament in the collected businesses
+def export_business_role(bulk, table, **kwargs):
+    """Loads table for the collected businesses and writes the same relationships and
+    properties as parlament_class.BusinessRole to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = fetch_in_chunks(pc.load_table, table, 'BusinessNumber', collected_ids(bulk, 'Geschäft'), **kwargs)
+    if df.empty:
+        return print("BusinessRole export finished")
+    submitters = [('Fraktion', 'ParlGroupNumber'), ('Kanton', 'CantonNumber'), ('Kommission', 'CommitteeNumber')]
+    for id_space, column in submitters:
+        bulk.relationships('HAT_EINGEREICHT', df[df[column] != 0], start=(id_space, column),
+                           end=('Geschäft', 'BusinessNumber'), properties={'Rolle': 'RoleName'})
+    members = df[df['MemberCouncilNumber'] != 0]
+    for role, relationship in BUSINESS_ROLE_TYPES.items():
+        bulk.relationships(relationship, members[members['Role'] == role], start=('Person', 'MemberCouncilNumber'),
+                           end=('Geschäft', 'BusinessNumber'), properties={'Rolle': 'RoleName'})
+    return print("BusinessRole export finished")
+
+#Relationships between the collected businesses
+def export_related_business(bulk, table, **kwargs):
+    """Loads table for the collected businesses and writes the same relationships as
+    parlament_class.related_business to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = fetch_in_chunks(pc.load_table, table, 'BusinessNumber', collected_ids(bulk, 'Geschäft'), **kwargs)
+    if not df.empty:
+        bulk.relationships('VERWANDT_MIT', df, start=('Geschäft', 'BusinessNumber'),
+                           end=('Geschäft', 'RelatedBusinessNumber'))
+    return print("RelatedBusiness export finished")
+
+#Departements responsible for the collected businesses
+def export_business_responsibility(bulk, table, **kwargs):
+    """Loads table for the collected businesses and writes the same entities,
+    relationships and properties as parlament_class.business_responsibility to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = fetch_in_chunks(pc.load_table, table, 'BusinessNumber', collected_ids(bulk, 'Geschäft'), **kwargs)
+    if not df.empty:
+        bulk.nodes('Departement', df, key=('Departementsnummer', 'DepartmentNumber'),
+                   properties={'Name': 'DepartmentName', 'Abkürzung': 'DepartmentAbbreviation'})
+        bulk.relationships('VERANTWORTLICH', df, start=('Departement', 'DepartmentNumber'),
+                           end=('Geschäft', 'BusinessNumber'), properties={'Federführung': 'IsLeading'})
+    return print("BusinessResponsibility export finished")
+
+#Details of the collected sessions
+def export_session(bulk, table, **kwargs):
+    """Loads table for the collected sessions and writes the same properties as
+    parlament_class.session to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = fetch_in_chunks(pc.load_table, table, 'ID', collected_ids(bulk, 'Session'), **kwargs)
+    if not df.empty:
+        bulk.nodes('Session', df, key=('Sessionsnummer', 'ID'),
+                   properties={'Name': 'SessionName', 'Startdatum': 'StartDate', 'Enddatum': 'EndDate',
+                                'Typ': 'TypeName', 'Legislationsnummer': 'LegislativePeriodNumber'},
+                   types={'Startdatum': 'date', 'Enddatum': 'date'})
+    return print("Session export finished")
+
+#Bills treated by the collected businesses
+def export_bill(bulk, table, **kwargs):
+    """Loads table for the collected businesses and writes the same entities and
+    relationships as parlament_class.bill to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = fetch_in_chunks(pc.load_table, table, 'BusinessNumber', collected_ids(bulk, 'Geschäft'), **kwargs)
+    if df.empty:
+        return print("Bill export finished")
+    bills = df[df['BillType'] != 0]
+    bulk.nodes('Gesetz', bills, key=('Gesetzesnummer', 'ID'), properties={'Name': 'Title', 'Typ': 'BillTypeName'})
+    bulk.relationships('BEHANDELT', bills, start=('Geschäft', 'BusinessNumber'), end=('Gesetz', 'ID'))
+    return print("Bill export finished")
+
+#Resolutions of the councils and committees on the collected bills
+def export_resolution(bulk, table, **kwargs):
+    """Loads table for the collected bills and writes the same relationships and
+    properties as parlament_class.resolution to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    table : str
+        Name of the table
+    kwargs :
+        Optional arguments for filtering the returned data
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = fetch_in_chunks(pc.load_table, table, 'IdBill', collected_ids(bulk, 'Gesetz'), **kwargs)
+    if df.empty:
+        return print("Resolution export finished")
+    properties = {'Entscheidung': 'ResolutionText', 'Entscheidungsdatum': 'ResolutionDate'}
+    bulk.relationships('HAT_ENTSCHIEDEN', df[df['Council'] != 0], start=('Rat', 'Council'),
+                       end=('Gesetz', 'IdBill'), properties=properties)
+    bulk.relationships('HAT_ENTSCHIEDEN', df[df['CommitteeType'] != 0], start=('Kommission', 'Committee'),
+                       end=('Gesetz', 'IdBill'), properties=properties)
+    return print("Resolution export finished")
+
+#Lobbywatch organisations and their links to members of parliament, as integration_class.py integrates them
+def export_lobbywatch(bulk, db_read):
+    """Reads the organisations and their links to members of parliament from the
+    lobbywatch database and writes them to the import files
+
+    Parameters
+    ----------
+    bulk : BulkImport
+        Collector of the import files
+    db_read : str
+        Name of the lobbywatch database
+
+    Returns
+    -------
+    str
+        Completion message
+    """
+    df = di.read_organisation(db_read)
+    bulk.nodes('Organisation', df, key=('ID', 'ID'),
+               properties={'Name': 'Name', 'Beschreibung': 'Beschreibung', 'uid': 'uid',
+                           'Postleitzahl': 'PLZ', 'Ort': 'Ort', 'Rechtsform': 'Rechtsform'})
+
+    df = di.read_parlamentarier_organisation_link(db_read)
+    bulk.relationships('HAT_INTERESSENBINDUNG_MIT', df[df['type'] == "HAT_INTERESSENBINDUNG_MIT"],
+                       start=('Person', 'id_a'), end=('Organisation', 'id_b'))
+    bulk.relationships('VERGUETED', df[df['type'] == "VERGUETED"],
+                       start=('Organisation', 'id_b'), end=('Person', 'id_a'))
+    return print("Lobbywatch export finished")
@@ -0,0 +1,56 @@
+import os
+from datetime import datetime
+from utils.bulk_import import BulkImport
+import bulk_class as bc
+
+#Directory of the import files, must be readable by the Neo4j installation running neo4j-admin
+import_dir = os.getenv('NEO4J_IMPORT_DIR', 'bulk_import')
+
+#Define database for loading lobbywatch data
+read_db = "lobbywatch-v1"
+
+#Define database for final knowledge graph
+db = "swissparlgraph"
+
+#Write import files with the same filters as parlament_dataload.py
+business_filter = {'BusinessStatusDate__gt': datetime.fromisoformat('2023-12-03 23:00:00 Z')}
+
+bulk = BulkImport(import_dir)
+
+#Tables are exported in the order of the stages of parlament_dataload.py, later tables only
+#refer to the nodes collected by the earlier ones as the loaders MATCH them in the database
+bc.export_membercouncil(bulk, 'MemberCouncil', Active = True)
+
+bc.export_person_occupation(bulk, 'PersonOccupation')
+
+bc.export_person_address(bulk, 'PersonAddress')
+
+bc.export_citizenship(bulk, 'Citizenship')
+
+bc.export_member_committee(bulk, 'MemberCommittee')
+
+bc.export_committee(bulk, 'Committee')
+
+bc.export_business(bulk, 'Business', **business_filter)
+
+bc.export_vote(bulk, 'Vote', IdLegislativePeriod=52)
+
+bc.export_voting(bulk, 'Voting', IdLegislativePeriod=52)
+
+bc.export_business_role(bulk, 'BusinessRole')
+
+bc.export_related_business(bulk, 'RelatedBusiness')
+
+bc.export_business_responsibility(bulk, 'BusinessResponsibility')
+
+bc.export_session(bulk, 'Session')
+
+bc.export_bill(bulk, 'Bill')
+
+bc.export_resolution(bulk, 'Resolution')
+
+bc.export_lobbywatch(bulk, read_db)
+
+#Import with neo4j-admin into a stopped database, afterwards parlament_dataload.py and
+#integration_dataload.py create the constraints, the business texts and embeddings and the remaining links
+print(bulk.finish(db))
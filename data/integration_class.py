@@ -1,5 +1,7 @@
 import os
 from utils.neo4j_python_connection import Neo4jConnection
+from utils.ids import load_crosswalk, normalize_ids, to_personennummer
+from utils.graph_sync import column_pairs, sync_relationships
 import pandas as pd
 
 #Initiate Neo4j-database connection
@@ -16,42 +18,48 @@ read_db_wiki = "wiki-v1"
 #Define database for final knowledge graph
 write_db = "swissparlgraph"
 
+#Lobbywatch parliamentarians are mapped to their Personennummer with the crosswalk of utils/ids.py
+def crosswalk(db_read):
+    return load_crosswalk(conn, db_read)
+
 #Functions for integrating data from lobbywatch with data from parlamentsdienste
 def integrate_person_canton_link(db_read, db_write):
     query = '''
             MATCH (p:Parlamentarier)-[l:WOHNT_IM_KANTON]->(k:Kanton)
-            RETURN p.parlament_biografie_id, k.id
+            RETURN p.id, k.id
             '''       
-    result = conn.query(query, db=db_read)
+    result = conn.query(query, db=db_read, full_scan=True)
     df = pd.DataFrame(result, columns=["Personennummer", "Kantonsnummer"])
+    df = to_personennummer(normalize_ids(df, ["Kantonsnummer"]), "Personennummer", crosswalk(db_read))
 
     query = '''
             UNWIND $rows AS row
-            MATCH (p:Person {Personennummer: toFloat(row.Personennummer)})
+            MATCH (p:Person {Personennummer: row.Personennummer})
             WITH row, p
-            MATCH (k:Kanton {Kantonsnummer: toFloat(row.Kantonsnummer)})
+            MATCH (k:Kanton {Kantonsnummer: row.Kantonsnummer})
             MERGE (p)-[l:WOHNT_IM_KANTON]->(k)
             RETURN count(l) as total
             '''
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    return conn.write_batches(query, df, db=db_write)
 
 
 def integrate_person_person_link(db_read, db_write):
     query = '''
             MATCH (p:Parlamentarier)-[l:HAT_ZUTRITTSBERECHTIGTER]->(z:Person)
-            RETURN p.parlament_biografie_id, z.id, l.funktion, z.anzeige_name, 
+            RETURN p.id, z.id, l.funktion, z.anzeige_name, 
                 z.nachname, z.vorname, z.beruf, z.geschlecht, z.beschreibung_de
             '''       
-    result = conn.query(query, db=db_read)
+    result = conn.query(query, db=db_read, full_scan=True)
     df = pd.DataFrame(result, 
                       columns=["Personennummer", "id", "Funktion", "Name", "Nachname",
                                "Vorname", "Beruf", "Geschlecht", "Beschreibung"])
+    df = to_personennummer(normalize_ids(df, ["id"]), "Personennummer", crosswalk(db_read))
 
     query = '''
             UNWIND $rows AS row
-            MATCH (p:Person {Personennummer: toFloat(row.Personennummer)})
+            MATCH (p:Person {Personennummer: row.Personennummer})
             WITH row, p
-            MERGE (z:Person {ID: toFloat(row.id)})
+            MERGE (z:Person {ID: row.id})
             SET z.Name = row.Vorname + " " + row.Nachname,
             z.Nachname = row.Nachname,
             z.Vorname = row.Vorname,
@@ -62,22 +70,27 @@ def integrate_person_person_link(db_read, db_write):
             SET l.Funktion = row.Funktion
             RETURN count(l) as total
             '''
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    return conn.write_batches(query, df, db=db_write)
 
 
-def integrate_organisation(db_read, db_write):
+def read_organisation(db_read):
     query = '''
                 MATCH (o:Organisation)
                 RETURN o.anzeige_name_de, o.id, o.beschreibung, o.uid, o.adresse_plz, o.ort, o.rechtsform
 
             '''       
-    result = conn.query(query, db=db_read)
+    result = conn.query(query, db=db_read, full_scan=True)
     df = pd.DataFrame(result, 
                       columns=["Name", "ID", "Beschreibung", "uid", "PLZ", "Ort", "Rechtsform"])
+    return normalize_ids(df, ["ID"])
+
+
+def integrate_organisation(db_read, db_write):
+    df = read_organisation(db_read)
 
     query = '''
             UNWIND $rows AS row
-            MERGE (o:Organisation {ID: toFloat(row.ID)})            
+            MERGE (o:Organisation {ID: row.ID})            
             SET o.Name = row.Name,
             o.Beschreibung = row.Beschreibung,
             o.uid = row.uid,
@@ -86,7 +99,7 @@ def integrate_organisation(db_read, db_write):
             o.Rechtsform = row.Rechtsform
             RETURN count(o) as total
             '''
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    return conn.write_batches(query, df, db=db_write)
 
 
 def integrate_organisation_organisation_link(db_read, db_write):
@@ -94,64 +107,54 @@ def integrate_organisation_organisation_link(db_read, db_write):
                 MATCH (o:Organisation)-[l]->(z:Organisation)
                 RETURN o.id, l.id, l.art, z.id
             '''       
-    result = conn.query(query, db=db_read)
+    result = conn.query(query, db=db_read, full_scan=True)
     df = pd.DataFrame(result, 
                       columns=["id_a", "id_link", "art", "id_b"])
+    df = normalize_ids(df, ["id_a", "id_b"])
 
-    queries = [
-        '''
+    queries = {
+        "arbeitet fuer": '''
             UNWIND $rows AS row
-            WITH row
-            WHERE row.art = "arbeitet fuer"
-            MATCH (o:Organisation {ID: toFloat(row.id_a)})
+            MATCH (o:Organisation {ID: row.id_a})
             WITH row, o
-            MATCH (z:Organisation {ID: toFloat(row.id_b)})
+            MATCH (z:Organisation {ID: row.id_b})
             MERGE (o)-[l:ARBEITET_FUER]->(z)
             RETURN count(l)
         ''',
-        '''
+        "beteiligt an": '''
             UNWIND $rows AS row
-            WITH row
-            WHERE row.art = "beteiligt an"
-            MATCH (o:Organisation {ID: toFloat(row.id_a)})
+            MATCH (o:Organisation {ID: row.id_a})
             WITH row, o
-            MATCH (z:Organisation {ID: toFloat(row.id_b)})
+            MATCH (z:Organisation {ID: row.id_b})
             MERGE (o)-[l:BETEILIGT_AN]->(z)
             RETURN count(l)
         ''',
-        '''
+        "mitglied von": '''
             UNWIND $rows AS row
-            WITH row
-            WHERE row.art = "mitglied von"
-            MATCH (o:Organisation {ID: toFloat(row.id_a)})
+            MATCH (o:Organisation {ID: row.id_a})
             WITH row, o
-            MATCH (z:Organisation {ID: toFloat(row.id_b)})
+            MATCH (z:Organisation {ID: row.id_b})
             MERGE (o)-[l:MITGLIED_VON]->(z)
             RETURN count(l)
         ''',
-        '''
+        "partner von": '''
             UNWIND $rows AS row
-            WITH row
-            WHERE row.art = "partner von"
-            MATCH (o:Organisation {ID: toFloat(row.id_a)})
+            MATCH (o:Organisation {ID: row.id_a})
             WITH row, o
-            MATCH (z:Organisation {ID: toFloat(row.id_b)})
+            MATCH (z:Organisation {ID: row.id_b})
             MERGE (o)-[l:PARTNER_VON]->(z)
             RETURN count(l)
         ''',
-        '''
+        "tochtergesellschaft von": '''
             UNWIND $rows AS row
-            WITH row
-            WHERE row.art = "tochtergesellschaft von"
-            MATCH (o:Organisation {ID: toFloat(row.id_a)})
+            MATCH (o:Organisation {ID: row.id_a})
             WITH row, o
-            MATCH (z:Organisation {ID: toFloat(row.id_b)})
+            MATCH (z:Organisation {ID: row.id_b})
             MERGE (o)-[l:TOCHTERGESELLSCHAFT_VON]->(z)
             RETURN count(l)
         '''
-    ]
-    for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    }
+    conn.write_grouped(queries, df, 'art', db=db_write)
     return print("Organisation links import finished")
 
 def integrate_organisation_text_link(db_read, db_write):
@@ -159,57 +162,65 @@ def integrate_organisation_text_link(db_read, db_write):
                 MATCH (o:Organisation)-[l]-(t:Text)
                 RETURN o.id, l.id, t.ID, t.info, t.Name, t.vector
             '''       
-    result = conn.query(query, db=db_read)
-    df = pd.DataFrame(result, 
-                      columns=["id_a", "id_link", "id_b", "info", "Name", "vector"])
+    frames = conn.stream_frames(query, db=db_read, full_scan=True,
+                                columns=["id_a", "id_link", "id_b", "info", "Name", "vector"])
 
     query = '''
             UNWIND $rows AS row
-            MERGE (o:Organisation {ID: toFloat(row.id_a)})            
+            MERGE (o:Organisation {ID: row.id_a})            
             WITH row, o
-            MERGE (t:Text {ID: toFloat(row.id_b)})
+            MERGE (t:Text {ID: row.id_b})
             SET t.Name = row.Name,
             t.info = row.info,
             t.vector = row.vector
             MERGE (o)-[l:HAT_TEXT]->(t)
             RETURN count(l) as total
             '''
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    return [counters for df in frames
+            for counters in conn.write_batches(query, normalize_ids(df, ["id_a", "id_b"]), db=db_write)]
 
 
-def integrate_parlamentarier_organisation_link(db_read, db_write):
+def read_parlamentarier_organisation_link(db_read):
     query = '''
                 MATCH (p:Parlamentarier)-[l]-(o:Organisation)
-                RETURN p.parlament_biografie_id, o.id, l.id, type(l), l.status 
+                RETURN p.id, o.id, l.id, type(l), l.status 
             '''       
-    result = conn.query(query, db=db_read)
+    result = conn.query(query, db=db_read, full_scan=True)
     df = pd.DataFrame(result, 
                       columns=["id_a", "id_b", "id_link", "type", "status"])
-
-    queries = [
-        '''
+    return to_personennummer(normalize_ids(df, ["id_b"]), "id_a", crosswalk(db_read))
+
+
+#Delete interest links of parliamentarians that lobbywatch no longer lists before merging the current ones
+def integrate_parlamentarier_organisation_link(db_read, db_write, sync=False):
+    df = read_parlamentarier_organisation_link(db_read)
+    if sync:
+        links = df[df['type'] == "HAT_INTERESSENBINDUNG_MIT"]
+        sync_relationships(conn, 'HAT_INTERESSENBINDUNG_MIT', ('Person', 'Personennummer'), ('Organisation', 'ID'),
+                           column_pairs(links, 'id_a', 'id_b'), db_write)
+        links = df[df['type'] == "VERGUETED"]
+        sync_relationships(conn, 'VERGUETED', ('Organisation', 'ID'), ('Person', 'Personennummer'),
+                           column_pairs(links, 'id_b', 'id_a'), db_write)
+
+    queries = {
+        "HAT_INTERESSENBINDUNG_MIT": '''
             UNWIND $rows AS row
-            WITH row
-            WHERE row.type = "HAT_INTERESSENBINDUNG_MIT"
-            MATCH (p:Person {Personennummer: toFloat(row.id_a)})
+            MATCH (p:Person {Personennummer: row.id_a})
             WITH row, p
-            MATCH (o:Organisation {ID: toFloat(row.id_b)})
+            MATCH (o:Organisation {ID: row.id_b})
             MERGE (p)-[l:HAT_INTERESSENBINDUNG_MIT]->(o)
             RETURN count(l)
         ''',
-        '''
+        "VERGUETED": '''
             UNWIND $rows AS row
-            WITH row
-            WHERE row.type = "VERGUETED"
-            MATCH (p:Person {Personennummer: toFloat(row.id_a)})
+            MATCH (p:Person {Personennummer: row.id_a})
             WITH row, p
-            MATCH (o:Organisation {ID: toFloat(row.id_b)})
+            MATCH (o:Organisation {ID: row.id_b})
             MERGE (p)<-[l:VERGUETED]-(o)
             RETURN count(l)
         '''
-    ]
-    for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    }
+    conn.write_grouped(queries, df, 'type', db=db_write)
     return print("Organisation-Parlamentarier links import finished")
 
 
@@ -220,36 +231,32 @@ def integrate_person_organisation_link(db_read, db_write):
                 MATCH (p:Person)-[l]-(o:Organisation)
                 RETURN p.id, o.id, l.id, type(l), l.art, l.beschreibung
             '''       
-    result = conn.query(query, db=db_read)
+    result = conn.query(query, db=db_read, full_scan=True)
     df = pd.DataFrame(result, 
                       columns=["id_a", "id_b", "id_link", "type", "art", "beschreibung"])
+    df = normalize_ids(df, ["id_a", "id_b"])
 
-    queries = [
-        '''
+    queries = {
+        "HAT_MANDAT": '''
             UNWIND $rows AS row
-            WITH row
-            WHERE row.type = "HAT_MANDAT"
-            MATCH (p:Person {ID: toFloat(row.id_a)})
+            MATCH (p:Person {ID: row.id_a})
             WITH row, p
-            MATCH (o:Organisation {ID: toFloat(row.id_b)})
+            MATCH (o:Organisation {ID: row.id_b})
             MERGE (p)-[l:HAT_MANDAT]->(o)
             SET l.Art = row.art,
             l.Beschreibung = row.beschreibung
             RETURN count(l)
         ''',
-        '''
+        "VERGUETED": '''
             UNWIND $rows AS row
-            WITH row
-            WHERE row.type = "VERGUETED"
-            MATCH (p:Person {ID: toFloat(row.id_a)})
+            MATCH (p:Person {ID: row.id_a})
             WITH row, p
-            MATCH (o:Organisation {ID: toFloat(row.id_b)})
+            MATCH (o:Organisation {ID: row.id_b})
             MERGE (p)<-[l:VERGUETED]-(o)
             RETURN count(l)
         '''
-    ]
-    for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    }
+    conn.write_grouped(queries, df, 'type', db=db_write)
     return print("Organisation-Person links import finished")
 
 
@@ -259,21 +266,22 @@ def integrate_organisation_interessenraum_link(db_read, db_write):
                 RETURN o.id, l.id, i.id, i.anzeige_name, i.beschreibung 
 
             '''       
-    result = conn.query(query, db=db_read)
+    result = conn.query(query, db=db_read, full_scan=True)
     df = pd.DataFrame(result, 
                       columns=["id_a", "id_link", "id_b", "Name", "Beschreibung"])
+    df = normalize_ids(df, ["id_a", "id_b"])
 
     query = '''
             UNWIND $rows AS row
-            MERGE (o:Organisation {ID: toFloat(row.id_a)})            
+            MERGE (o:Organisation {ID: row.id_a})            
             WITH row, o
-            MERGE (i:Interessenraum {ID: toFloat(row.id_b)})
+            MERGE (i:Interessenraum {ID: row.id_b})
             SET i.Name = row.Name,
             i.Beschreibung = row.Beschreibung
             MERGE (o)-[l:HAT_INTERESSENRAUM]->(i)
             RETURN count(l) as total
             '''
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    return conn.write_batches(query, df, db=db_write)
 
 
 def integrate_organisation_interessengruppe_link(db_read, db_write):
@@ -281,22 +289,23 @@ def integrate_organisation_interessengruppe_link(db_read, db_write):
                 MATCH (o:Organisation)-[l]-(g:Interessengruppe)
                 RETURN o.id, l.id, g.id, g.anzeige_name, g.beschreibung, g.alias_namen
             '''       
-    result = conn.query(query, db=db_read)
+    result = conn.query(query, db=db_read, full_scan=True)
     df = pd.DataFrame(result, 
                       columns=["id_a", "id_link", "id_b", "name", "beschreibung", "beispiele"])
+    df = normalize_ids(df, ["id_a", "id_b"])
 
     query = '''
             UNWIND $rows AS row
-            MERGE (o:Organisation {ID: toFloat(row.id_a)})            
+            MERGE (o:Organisation {ID: row.id_a})            
             WITH row, o
-            MERGE (g:Interessengruppe {ID: toFloat(row.id_b)})
+            MERGE (g:Interessengruppe {ID: row.id_b})
             SET g.Name = row.name,
             g.Beschreibung = row.beschreibung,
             g.Beispiele = row.beispiele
             MERGE (o)-[l:GEHOERT_ZU]->(g)
             RETURN count(l) as total
             '''
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    return conn.write_batches(query, df, db=db_write)
 
 
 def integrate_interessengruppe_branche_link(db_read, db_write):
@@ -304,21 +313,22 @@ def integrate_interessengruppe_branche_link(db_read, db_write):
                 MATCH (g:Interessengruppe)-[l]-(b:Branche)
                 RETURN g.id, l.id, b.id, b.anzeige_name, b.beschreibung
             '''       
-    result = conn.query(query, db=db_read)
+    result = conn.query(query, db=db_read, full_scan=True)
     df = pd.DataFrame(result, 
                       columns=["id_a", "id_link", "id_b", "name", "beschreibung"])
+    df = normalize_ids(df, ["id_a", "id_b"])
 
     query = '''
             UNWIND $rows AS row
-            MERGE (g:Interessengruppe {ID: toFloat(row.id_a)})            
+            MERGE (g:Interessengruppe {ID: row.id_a})            
             WITH row, g
-            MERGE (b:Branche {ID: toFloat(row.id_b)})
+            MERGE (b:Branche {ID: row.id_b})
             SET b.Name = row.name,
             b.Beschreibung = row.beschreibung
             MERGE (g)-[l:IST_IN_BRANCHE]->(b)
             RETURN count(l) as total
             '''
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    return conn.write_batches(query, df, db=db_write)
 
 
 def integrate_branche_kommission_link(db_read, db_write):
@@ -326,19 +336,20 @@ def integrate_branche_kommission_link(db_read, db_write):
                 MATCH (k:Kommission)-[l]-(b:Branche)
                 RETURN k.parlament_id, l.id, b.id
             '''       
-    result = conn.query(query, db=db_read)
+    result = conn.query(query, db=db_read, full_scan=True)
     df = pd.DataFrame(result, 
                       columns=["id_a", "id_link", "id_b"])
+    df = normalize_ids(df, ["id_a", "id_b"])
 
     query = '''
             UNWIND $rows AS row
-            MATCH (k:Kommission {Kommissionsnummer: toFloat(row.id_a)})            
+            MATCH (k:Kommission {Kommissionsnummer: row.id_a})            
             WITH row, k
-            MERGE (b:Branche {ID: toFloat(row.id_b)})
+            MERGE (b:Branche {ID: row.id_b})
             MERGE (b)-[l:HAT_ZUSTAENDIGE_KOMMISSION]->(k)
             RETURN count(l) as total
             '''
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    return conn.write_batches(query, df, db=db_write)
 
 #Function for integrating data from wikipedia with data from parlamentsdienste
 def integrate_wikipedia_link(db_read, db_write):
@@ -346,15 +357,12 @@ def integrate_wikipedia_link(db_read, db_write):
                 MATCH (w)
                 RETURN w.id, w.parent_id, w.label, w.title, w.source, w.info, w.vector
             '''       
-    result = conn.query(query, db=db_read)
-    df = pd.DataFrame(result, 
-                      columns=["id", "parent_id", "label", "title", "source", "info", "vector"])
+    frames = conn.stream_frames(query, db=db_read, full_scan=True,
+                                columns=["id", "parent_id", "label", "title", "source", "info", "vector"])
 
-    queries = [
-        '''
+    queries = {
+        "Parlamentarier": '''
             UNWIND $rows AS row
-            WITH row
-            WHERE row.label = "Parlamentarier"
             MATCH (p:Parlamentarier {Personennummer: row.parent_id})
             WITH row, p
             MERGE (t:Text {ID: row.id})
@@ -366,10 +374,8 @@ def integrate_wikipedia_link(db_read, db_write):
             t.vector = row.vector
             RETURN count(l)
         ''',
-        '''
+        "Departement": '''
         UNWIND $rows AS row
-        WITH row
-        WHERE row.label = "Departement"
         MATCH (d:Departement {Departementsnummer: row.parent_id})
         WITH row, d
         MERGE (t:Text {ID: row.id})
@@ -381,10 +387,8 @@ def integrate_wikipedia_link(db_read, db_write):
         t.vector = row.vector
         RETURN count(l)
         ''',
-        '''
+        "Rat": '''
         UNWIND $rows AS row
-        WITH row
-        WHERE row.label = "Rat"
         MATCH (d:Rat {Ratnummer: row.parent_id})
         WITH row, d
         MERGE (t:Text {ID: row.id})
@@ -396,10 +400,8 @@ def integrate_wikipedia_link(db_read, db_write):
         t.vector = row.vector
         RETURN count(l)
         ''',
-        '''
+        "Partei": '''
         UNWIND $rows AS row
-        WITH row
-        WHERE row.label = "Partei"
         MATCH (d:Partei {Parteinummer: row.parent_id})
         WITH row, d
         MERGE (t:Text {ID: row.id})
@@ -411,10 +413,8 @@ def integrate_wikipedia_link(db_read, db_write):
         t.vector = row.vector
         RETURN count(l)
         ''',
-        '''
+        "Kanton": '''
         UNWIND $rows AS row
-        WITH row
-        WHERE row.label = "Kanton"
         MATCH (d:Kanton {Kantonsnummer: row.parent_id})
         WITH row, d
         MERGE (t:Text {ID: row.id})
@@ -426,9 +426,9 @@ def integrate_wikipedia_link(db_read, db_write):
         t.vector = row.vector
         RETURN count(l)
         '''
-    ]
-    for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db_write)
+    }
+    for df in frames:
+        conn.write_grouped(queries, normalize_ids(df, ["parent_id"]), 'label', db=db_write)
     return print("Wikipedia integration import finished")
 
 
@@ -1,5 +1,7 @@
 import os
 from utils.neo4j_python_connection import Neo4jConnection
+from utils.schema import ensure_schema
+from utils.ids import build_crosswalk
 import pandas as pd
 import integration_class as di
 
@@ -17,23 +19,16 @@ read_db_wiki = "wiki-v1"
 #Define database for final knowledge graph
 write_db = "swissparlgraph"
 
+#Delete links of parliamentarians missing in the lobbywatch export if SPP_SYNC is set
+sync = os.getenv('SPP_SYNC', '').lower() in ('1', 'true')
 
-#Set database constraints to ensure uniqueness of entities
-conn.query('CREATE CONSTRAINT Person IF NOT EXISTS FOR (p:Person) REQUIRE p.ID IS UNIQUE',
-           db=write_db)
 
-conn.query('CREATE CONSTRAINT Organisation IF NOT EXISTS FOR (o:Organisation) REQUIRE o.ID IS UNIQUE',
-           db=write_db)
+#Create the constraints and indexes of all lookup keys declared in utils/schema.py
+ensure_schema(conn, write_db)
 
-conn.query('CREATE CONSTRAINT Interessenraum IF NOT EXISTS FOR (i:Interessenraum) REQUIRE i.ID IS UNIQUE',
-           db=write_db)
-
-conn.query('CREATE CONSTRAINT Interessengruppe IF NOT EXISTS FOR (g:Interessengruppe) REQUIRE g.ID IS UNIQUE',
-           db=write_db)
-
-conn.query('CREATE CONSTRAINT Branche IF NOT EXISTS FOR (b:Branche) REQUIRE b.ID IS UNIQUE',
-           db=write_db)
 
+#Persist the Personennummer of the lobbywatch parliamentarians used by the integration functions
+build_crosswalk(conn, read_db)
 
 #Integrate data from lobbywatch with data from parlamentsdienste
 di.integrate_person_canton_link(read_db, write_db)
@@ -46,7 +41,7 @@ di.integrate_organisation_organisation_link(read_db, write_db)
 
 di.integrate_organisation_text_link(read_db, write_db)
 
-di.integrate_parlamentarier_organisation_link(read_db, write_db)
+di.integrate_parlamentarier_organisation_link(read_db, write_db, sync=sync)
 
 di.integrate_person_organisation_link(read_db, write_db)
 
@@ -1,11 +1,11 @@
-from utils.neo4j_python_connection import Neo4jConnection
+from utils.neo4j_python_connection import Neo4jConnection, iter_batches
 import os
 import pandas as pd
 import os
-from utils.utils import clean_text
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.vectorstores import Neo4jVector
-from langchain_openai import OpenAIEmbeddings
+from utils.utils import clean_texts
+from utils.chunking import STORE_BATCH_SIZE, iter_chunks
+from utils.text_dedup import dedup_texts, text_documents
+from utils.vector_store import store_documents
 
 #Initiate Neo4j-connection
 conn = Neo4jConnection(uri=os.getenv('NEO4J_url'), 
@@ -28,28 +28,7 @@ def store_docs_in_neo4j(documents, db):
     """
     Store and index text with Neo4j.
     """
-    # Neo4j credentials
-    url=os.getenv('NEO4J_url')
-    username = os.getenv('NEO4J_user')
-    password = os.getenv('NEO4J_pwd')
-
-    # OpenAI credentials
-    openai_api_secret_key = os.getenv('OPENAI_API_KEY')
-
-    # Instantiate Neo4j vector from documents
-    Neo4jVector.from_documents(
-        documents,
-        OpenAIEmbeddings(openai_api_key=openai_api_secret_key),
-        database=db,
-        url=url,
-        username=username,
-        password=password,
-        index_name="organisation",  
-        node_label="Text", 
-        text_node_property="info", 
-        embedding_node_property="vector",
-        create_id_index=True 
-    )
+    store_documents(documents, db, index_name="organisation")
 
 #Function for loading texts about organisations from stored Lobbywatch data
 def load_process_organisation_texts(db):
@@ -57,23 +36,14 @@ def load_process_organisation_texts(db):
             MATCH (o:Organisation)
             RETURN o.id, o.beschreibung
             '''
-    result = conn.query_values(query, db=db)
+    result = conn.query_values(query, db=db, full_scan=True)
     df = pd.DataFrame(result, 
                       columns=["ID", "Beschreibung"])
 
-    df["Beschreibung"] = [clean_text(item, keep_punctuation=True) for item in df["Beschreibung"]]
+    df["Beschreibung"] = clean_texts(df["Beschreibung"], keep_punctuation=True)
+    unique, duplicates = dedup_texts(df, ["Beschreibung"])
 
-    text_splitter = CharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=512, chunk_overlap=20)
-    
-    g_dict = pd.DataFrame(df['ID']).to_dict(orient='records')
-
-    docs = text_splitter.create_documents(
-        texts=df["Beschreibung"],
-        metadatas=[dict(item, Name="Beschreibung") for item in g_dict]
-        )
-   
-    return docs
+    return iter_chunks(text_documents(unique), workers=os.cpu_count()), duplicates
     
 #Load, embed and store texts from lobbywatch data
 def load_embed_store_docs(db, **kwargs):
@@ -82,18 +52,33 @@ def load_embed_store_docs(db, **kwargs):
             f"\nLoad data from Lobbywatch and store OpenAI embeddings in a Neo4j Vector\n\t"
         )
 
-        processed_docs = load_process_organisation_texts(db, **kwargs)
-        store_docs_in_neo4j(processed_docs, db)
+        processed_docs, duplicates = load_process_organisation_texts(db, **kwargs)
+        for documents in iter_batches(processed_docs, STORE_BATCH_SIZE):
+            store_docs_in_neo4j(documents, db)
+        link_shared_texts(duplicates, db)
 
     except Exception as e:
         print(f"\n\tAn unexpected error occurred: {e}")
 
-#Link text entities to their respective parent entity
+#Link organisations to the chunks of an equal description stored for another organisation
+def link_shared_texts(duplicates, db):
+    query = '''
+            UNWIND $rows AS row
+            MATCH (o:Organisation {id: row.ID})
+            WITH row, o
+            MATCH (t:Text {ID: row.Text_ID})
+            WHERE t.Name = row.Text_Name
+            MERGE (o)-[l:HAT_TEXT]->(t)
+            RETURN count(l) as total
+            '''
+    return conn.write_batches(query, duplicates, db=db)
+
+#Link text entities to their respective parent entity, organisations without description have none
 def link_organisation_text(db):
     query = '''
                 MATCH (o:Organisation)
-                MERGE (t:Text {ID: o.id})
+                MATCH (t:Text {ID: o.id})
                 MERGE (o)-[l:HAT_TEXT]->(t)
                 RETURN count(l)
             '''       
-    return conn.query(query, db=db)
+    return conn.query(query, db=db, full_scan=True)
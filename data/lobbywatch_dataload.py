@@ -1,6 +1,6 @@
 from utils.neo4j_python_connection import Neo4jConnection
 import os
-import lobbywatch_lass as lw
+import lobbywatch_class as lw
 
 #Initiate Neo4j-database connection
 conn = Neo4jConnection(uri=os.getenv('NEO4J_url'), 
@@ -13,8 +13,6 @@ db = "lobbywatch-v1"
 #Load and process lobbywatch data as defined in lobbywatch_class.py
 lw.load_lobbywatch(db=db)
 
-lw.load_process_organisation_texts(db)
-
 lw.load_embed_store_docs(db)
 
 lw.link_organisation_text(db)
@@ -1,20 +1,33 @@
 import swissparlpy as spp
 import pandas as pd
-from utils.neo4j_python_connection import Neo4jConnection
+from utils.neo4j_python_connection import Neo4jConnection, iter_batches
 import os
-from utils.utils import clean_text
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.vectorstores import Neo4jVector
-from langchain_openai import OpenAIEmbeddings
+from utils.utils import clean_columns
+from utils.chunking import STORE_BATCH_SIZE, iter_chunks
+from utils.text_dedup import SHARED_TEXTS_FILE, dedup_texts, text_documents
+from utils.vector_store import store_documents
+from utils.odata_cache import DEFAULT_TTL, cached_table
+from utils.sync_state import TableWatermark
+from utils.odata_fetch import fetch_in_chunks, prefetch_pages, select_rows
+from utils.odata_replay import REPLAY_MODE, replayable
+from utils.row_hash import changed_rows, store_hashes
+from utils.graph_sync import column_keys, column_pairs, sync_nodes, sync_relationships
 
 #Initiate DBMS connection
 conn = Neo4jConnection(uri=os.getenv('NEO4J_url'), 
                        user=os.getenv('NEO4J_user'),              
                        pwd=os.getenv('NEO4J_pwd'))
 
-#Generic function for loading tables from Swiss Parliament Webservices
-def load_table(table, language = 'DE', **kwargs):
-    """Loads table and returns it as a Pandas dataframe
+#Open the rows of a table at the Swiss Parliament Webservices, or record and replay them (SPP_REPLAY)
+@replayable
+def open_rows(table, language = 'DE', columns = None, **kwargs):
+    if columns is None:
+        return spp.get_data(table, Language = language, **kwargs)
+    return select_rows(table, columns, Language = language, **kwargs)
+
+#Generic function for downloading tables from Swiss Parliament Webservices
+def fetch_table(table, language = 'DE', columns = None, **kwargs):
+    """Downloads table and returns it as a Pandas dataframe
     
     Parameters
     ----------
@@ -22,6 +35,8 @@ def load_table(table, language = 'DE', **kwargs):
         Name of the table
     language : str
         Language of the loaded table, defauls to 'DE'
+    columns : list
+        Optional columns to download with $select, defaults to all columns
     kwargs : 
         Optional arguments for filtering the returned data
         
@@ -30,14 +45,86 @@ def load_table(table, language = 'DE', **kwargs):
     Pandas Dataframe
         Returned table
     """
-    table = spp.get_data(table, Language = language, **kwargs)
-    table_df = pd.DataFrame(table)
+    table = open_rows(table, language, columns, **kwargs)
+    table_df = pd.DataFrame(table, columns = columns)
     return table_df
 
+#Generic function for loading tables from Swiss Parliament Webservices through the local cache
+def load_table(table, language = 'DE', cache_ttl = DEFAULT_TTL, refresh = False, **kwargs):
+    """Loads table from the local Parquet cache or downloads and caches it
+    
+    Parameters
+    ----------
+    table : str
+        Name of the table
+    language : str
+        Language of the loaded table, defauls to 'DE'
+    cache_ttl : float
+        Maximum age of the cached table in seconds, 0 disables the cache, which is
+        always bypassed while responses are recorded or replayed (SPP_REPLAY)
+    refresh : bool
+        Defines if the table should be downloaded even if it is cached
+    kwargs : 
+        Optional arguments for filtering the returned data, columns restricts the
+        downloaded columns
+        
+    Returns
+    -------
+    Pandas Dataframe
+        Returned table
+    """
+    if REPLAY_MODE:
+        cache_ttl = 0
+    return cached_table(fetch_table, table, language, ttl=cache_ttl, refresh=refresh, **kwargs)
+
+#Generic function for streaming tables from Swiss Parliament Webservices page by page
+def stream_table(table, language = 'DE', page_size = 1000, queue_depth = 4, columns = None, **kwargs):
+    """Downloads table in a background thread and yields it as Pandas dataframes while
+    the next pages are downloaded, bypassing the local cache
+    
+    Parameters
+    ----------
+    table : str
+        Name of the table
+    language : str
+        Language of the loaded table, defauls to 'DE'
+    page_size : int
+        Number of rows per dataframe, defaults to 1000
+    queue_depth : int
+        Maximum number of downloaded pages waiting to be stored, defaults to 4
+    columns : list
+        Optional columns to download with $select, defaults to all columns
+    kwargs : 
+        Optional arguments for filtering the returned data
+        
+    Returns
+    -------
+    generator
+        Pandas dataframes
+    """
+    return prefetch_pages(lambda: open_rows(table, language, columns, **kwargs),
+                          page_size=page_size, queue_depth=queue_depth)
+
+#Load a table at once or, if stream is set, as a stream of pages
+def load_pages(table, stream = False, cache_ttl = DEFAULT_TTL, **kwargs):
+    return stream_table(table, **kwargs) if stream else [load_table(table, cache_ttl = cache_ttl, **kwargs)]
+
+#Incremental loads bypass the cache, an empty delta would otherwise be served again until it expires
+def delta_ttl(mark):
+    return 0 if mark.enabled else DEFAULT_TTL
+
+#Columns of the MemberCouncil table read by membercouncil
+MEMBERCOUNCIL_COLUMNS = ['ID', 'LastName', 'FirstName', 'DateOfBirth', 'GenderAsString',
+                         'MartialStatusText', 'Active', 'Party', 'PartyName', 'PartyAbbreviation',
+                         'Council', 'CouncilName', 'CouncilAbbreviation', 'DateJoining', 'Canton',
+                         'CantonName', 'CantonAbbreviation', 'ParlGroupNumber', 'ParlGroupName',
+                         'ParlGroupAbbreviation', 'ParlGroupFunctionText']
+
 #Loading data about the member of parliament and storing it to a Neo4j database
-def membercouncil(table, db, **kwargs):
+def membercouncil(table, db, force=False, **kwargs):
     """Loads table and stores selected entities, relationships and properties to
-    the specified Neo4j database
+    the specified Neo4j database, skipping members whose row did not change since
+    the last load
     
     Parameters
     ----------
@@ -45,6 +132,8 @@ def membercouncil(table, db, **kwargs):
         Name of the table
     db : str
         Name of the database
+    force : bool
+        Defines if unchanged rows should be written as well
     kwargs : 
         Optional arguments for filtering the returned data
         
@@ -53,7 +142,9 @@ def membercouncil(table, db, **kwargs):
     str
         Completion message
     """
-    df = load_table(table, **kwargs)
+    df = load_table(table, columns=MEMBERCOUNCIL_COLUMNS, **kwargs)
+    key, hash_property = ('Personennummer', 'ID'), 'Hash_' + table
+    df = changed_rows(conn, df, 'Person', key, MEMBERCOUNCIL_COLUMNS, hash_property, db, force=force)
     queries = ['''
             UNWIND $rows AS row
             MERGE (p:Person {Personennummer: row.ID})
@@ -90,12 +181,6 @@ def membercouncil(table, db, **kwargs):
             RETURN count(*) as total
             ''',
             '''
-            MATCH (p:Person)-[]->(r:Rat)
-            WHERE r.Ratnummer < 3
-            SET p :Parlamentarier
-            RETURN count(p)
-            ''',
-            '''
             UNWIND $rows AS row
             MERGE (k:Kanton {Kantonsnummer: row.Canton})
             SET k.Name = row.CantonName,
@@ -128,9 +213,28 @@ def membercouncil(table, db, **kwargs):
             '''
     ]
     for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+        conn.write_batches(query, df, db=db)
+    store_hashes(conn, df, 'Person', key, hash_property, db)
+
+    query = '''
+            MATCH (p:Person)-[]->(r:Rat)
+            WHERE r.Ratnummer < 3
+            SET p :Parlamentarier
+            RETURN count(p)
+            '''
+    conn.query(query, db=db)
     return print("MemberCouncil import finished")
 
+#Query for storing the occupation of members of parliament
+QUERY_PERSON_OCCUPATION = '''
+            UNWIND $rows AS row
+            MATCH (p:Person {Personennummer: row.PersonNumber})
+            SET p.Berufsbezeichnung = row.OccupationName,
+            p.Arbeitgeber = row.Employer,
+            p.Berufstitel = row.JobTitle
+            RETURN count(p.Berufsbezeichnung) as count 
+            '''
+
 #Loading data about member of parliaments occupation and storing it to a Neo4j database
 def person_occupation(table, db, **kwargs):
     """Loads table and stores selected entities, relationships and properties to
@@ -151,15 +255,18 @@ def person_occupation(table, db, **kwargs):
         Number of entities/relationships processed
     """
     df = load_table(table, **kwargs)
-    query = '''
+    return conn.write_batches(QUERY_PERSON_OCCUPATION, df, db=db)
+
+#Query for storing the addresses of members of parliament
+QUERY_PERSON_ADDRESS = '''
             UNWIND $rows AS row
             MATCH (p:Person {Personennummer: row.PersonNumber})
-            SET p.Berufsbezeichnung = row.OccupationName,
-            p.Arbeitgeber = row.Employer,
-            p.Berufstitel = row.JobTitle
-            RETURN count(p.Berufsbezeichnung) as count 
-            '''       
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+            SET p.Adresse = row.AddressLine1,
+            p.Gemeinde = row.City,
+            p.Postleitzahl_Adresse = row.Postcode,
+            p.Adressentyp = row.AddressTypeName
+            RETURN count(p.Adresse) as count
+            '''
 
 #Loading data about the member of parliaments addresses and storing it to a Neo4j database
 def person_address(table, db, **kwargs):
@@ -181,16 +288,16 @@ def person_address(table, db, **kwargs):
         Number of entities/relationships processed
     """
     df = load_table(table, **kwargs)
-    query = '''
+    return conn.write_batches(QUERY_PERSON_ADDRESS, df, db=db)
+
+#Query for storing the citizenship of members of parliament
+QUERY_CITIZENSHIP = '''
             UNWIND $rows AS row
             MATCH (p:Person {Personennummer: row.PersonNumber})
-            SET p.Adresse = row.AddressLine1,
-            p.Gemeinde = row.City,
-            p.Postleitzahl_Adresse = row.Postcode,
-            p.Adressentyp = row.AddressTypeName
-            RETURN count(p.Adresse) as count
-            '''       
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+            SET p.Heimatort = row.City,
+            p.Postleitzahl_Heimatort = row.PostCode
+            RETURN count(p.Heimatort) as count
+            '''
 
 #Loading data about the member of parliaments citizenship and storing it to a Neo4j database
 def citizenship(table, db, **kwargs):
@@ -212,17 +319,24 @@ def citizenship(table, db, **kwargs):
         Number of entities/relationships processed
     """
     df = load_table(table, **kwargs)
-    query = '''
+    return conn.write_batches(QUERY_CITIZENSHIP, df, db=db)
+
+#Query for storing the committee memberships of members of parliament
+QUERY_MEMBER_COMMITTEE = '''
             UNWIND $rows AS row
+            MERGE (c:Kommission {Kommissionsnummer: row.CommitteeNumber})
+            SET c.Name = row.CommitteeName,
+            c.Typ = row.CommitteeTypeName,
+            c.Abkürzung = row.Abbreviation
+            WITH row, c
             MATCH (p:Person {Personennummer: row.PersonNumber})
-            SET p.Heimatort = row.City,
-            p.Postleitzahl_Heimatort = row.PostCode
-            RETURN count(p.Heimatort) as count
-            '''       
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+            MERGE (p)-[l:MITGLIED_VON]->(c)
+            SET l.Funktion = row.CommitteeFunctionName
+            RETURN count(c.Name) as total
+            '''
 
 #Loading data about the members of parliaments committee membership and storing it to a Neo4j database
-def member_committee(table, db, **kwargs):
+def member_committee(table, db, sync=False, **kwargs):
     """Loads table and stores selected entities, relationships and properties to
     the specified Neo4j database
     
@@ -232,6 +346,8 @@ def member_committee(table, db, **kwargs):
         Name of the table
     db : str
         Name of the database
+    sync : bool
+        Defines if memberships missing in the table, e.g. ended ones, are deleted
     kwargs : 
         Optional arguments for filtering the returned data
         
@@ -241,19 +357,10 @@ def member_committee(table, db, **kwargs):
         Number of entities/relationships processed
     """
     df = load_table(table, **kwargs)
-    query = '''
-            UNWIND $rows AS row
-            MERGE (c:Kommission {Kommissionsnummer: row.CommitteeNumber})
-            SET c.Name = row.CommitteeName,
-            c.Typ = row.CommitteeTypeName,
-            c.Abkürzung = row.Abbreviation
-            WITH row, c
-            MATCH (p:Person {Personennummer: row.PersonNumber})
-            MERGE (p)-[l:MITGLIED_VON]->(c)
-            SET l.Funktion = row.CommitteeFunctionName
-            RETURN count(c.Name) as total
-            '''       
-    return conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+    if sync:
+        sync_relationships(conn, 'MITGLIED_VON', ('Person', 'Personennummer'), ('Kommission', 'Kommissionsnummer'),
+                           column_pairs(df, 'PersonNumber', 'CommitteeNumber'), db)
+    return conn.write_batches(QUERY_MEMBER_COMMITTEE, df, db=db)
 
 #Loading data about the committees of the Swiss parliament and storing it to a Neo4j database
 def committee(table, db, **kwargs):
@@ -290,20 +397,25 @@ def committee(table, db, **kwargs):
             WHERE row.Council = 3
             MATCH (c:Kommission {Kommissionsnummer: row.CommitteeNumber})
             WITH row, c
-            MATCH (r:Rat)
-            WHERE r.Ratnummer <> 99
+            UNWIND [1, 2] AS council
+            MATCH (r:Rat {Ratnummer: council})
             MERGE (c)-[l:TEIL_VON]->(r)
             RETURN count(l) as total
             '''
     ]
     for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+        conn.write_batches(query, df, db=db)
     return print("Committee import finished") 
 
+#Columns of the Vote table read by vote
+VOTE_COLUMNS = ['RegistrationNumber', 'BusinessNumber', 'BusinessShortNumber', 'BusinessTitle',
+                'Subject', 'MeaningYes', 'MeaningNo', 'VoteEndWithTimezone', 'IdSession', 'SessionName']
+
 #Loading data about the votes in Swiss Parliament and storing it to a Neo4j database
-def vote(table, db, **kwargs):
+def vote(table, db, incremental=False, force=False, **kwargs):
     """Loads table and stores selected entities, relationships and properties to
-    the specified Neo4j database
+    the specified Neo4j database, skipping votes whose row did not change since
+    the last load
     
     Parameters
     ----------
@@ -311,6 +423,10 @@ def vote(table, db, **kwargs):
         Name of the table
     db : str
         Name of the database
+    incremental : bool
+        Defines if only rows modified since the last incremental run should be loaded
+    force : bool
+        Defines if unchanged rows should be written as well
     kwargs : 
         Optional arguments for filtering the returned data
         
@@ -319,7 +435,10 @@ def vote(table, db, **kwargs):
     str
         Completion message
     """
-    df = load_table(table, **kwargs)
+    mark = TableWatermark(db, table, enabled=incremental)
+    df = load_table(table, cache_ttl=delta_ttl(mark), columns=mark.columns(VOTE_COLUMNS), **mark.filters(kwargs))
+    key, hash_property = ('Abstimmungsnummer', 'RegistrationNumber'), 'Hash_' + table
+    changed = changed_rows(conn, df, 'Abstimmung', key, VOTE_COLUMNS, hash_property, db, force=force)
     queries = [
         '''
             UNWIND $rows AS row
@@ -348,70 +467,82 @@ def vote(table, db, **kwargs):
             '''
     ]
     for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+        conn.write_batches(query, changed, db=db)
+    store_hashes(conn, changed, 'Abstimmung', key, hash_property, db)
+    mark.commit(df)
     return print("Vote import finished")
 
-#Loading data about the voting of members of the Swiss parliament and storing it to a Neo4j database
-def voting(table, db, **kwargs):
-    """Loads table and stores selected entities, relationships and properties to
-    the specified Neo4j database
+#Columns of the Voting table read by voting
+VOTING_COLUMNS = ['PersonNumber', 'RegistrationNumber', 'Decision', 'DecisionText']
+
+#Relationship type per decision, every decision above 2 means the member did not vote
+VOTING_TYPES = {1: 'JA_GESTIMMT', 2: 'NEIN_GESTIMMT', 3: 'NICHT_ABGESTIMMT'}
+
+#Map key property values of nodes to their element IDs
+def resolve_element_ids(label, key, values, db):
+    """Looks up the nodes of a label by their key property once for all given values
     
     Parameters
     ----------
-    table : str
-        Name of the table
+    label : str
+        Label of the nodes
+    key : str
+        Key property of the label
+    values : list
+        Values of the key property
     db : str
         Name of the database
-    kwargs : 
-        Optional arguments for filtering the returned data
         
     Returns
     -------
-    str
-        Completion message
+    dict
+        Element ID per found key value
     """
-    df = load_table(table, **kwargs)
-    queries = [
-        '''
-            UNWIND $rows AS row
-            WITH row
-            WHERE row.Decision = 1
-            MATCH (p:Person {Personennummer: row.PersonNumber})
-            WITH row, p
-            MATCH (a:Abstimmung {Abstimmungsnummer: row.RegistrationNumber})
-            MERGE (p)-[l:JA_GESTIMMT]->(a)
-            SET l.Entscheidung = row.DecisionText
-            RETURN count(l) as total
-            ''',
+    query = f'''
+            UNWIND $values AS value
+            MATCH (n:{label} {{{key}: value}})
+            RETURN value, elementId(n)
             '''
+    return dict(conn.query_values(query, parameters={'values': values}, db=db))
+
+#Query storing the votes of one decision between already resolved nodes
+def voting_query(relationship, create_only=False):
+    return f'''
             UNWIND $rows AS row
-            WITH row
-            WHERE row.Decision = 2
-            MATCH (p:Person {Personennummer: row.PersonNumber})
-            WITH row, p
-            MATCH (a:Abstimmung {Abstimmungsnummer: row.RegistrationNumber})
-            MERGE (p)-[l:NEIN_GESTIMMT]->(a)
+            MATCH (p) WHERE elementId(p) = row.person
+            MATCH (a) WHERE elementId(a) = row.vote
+            {'CREATE' if create_only else 'MERGE'} (p)-[l:{relationship}]->(a)
             SET l.Entscheidung = row.DecisionText
             RETURN count(l) as total
-            ''',
             '''
-            UNWIND $rows AS row
-            WITH row
-            WHERE row.Decision > 2
-            MATCH (p:Person {Personennummer: row.PersonNumber})
-            WITH row, p
-            MATCH (a:Abstimmung {Abstimmungsnummer: row.RegistrationNumber})
-            MERGE (p)-[l:NICHT_ABGESTIMMT]->(a)
-            SET l.Entscheidung = row.DecisionText
-            RETURN count(l) as total            
-            '''
-    ]
-    for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
-    return print("Voting import finished")
-  
-#Loading data about the businesses of the Swiss parliament and storing it to a Neo4j database
-def business(table, db, **kwargs):
+
+#Storing one page of the voting table in a Neo4j database
+def store_voting_page(df, db, create_only=False):
+    """Resolves the persons and votes of a page of the voting table once, splits the rows
+    by decision and stores every decision with its own relationship type
+    
+    Parameters
+    ----------
+    df : Pandas dataframe
+        Rows of the voting table
+    db : str
+        Name of the database
+    create_only : bool
+        Defines if the relationships are created without checking for existing ones
+    """
+    persons = resolve_element_ids('Person', 'Personennummer', df['PersonNumber'].dropna().unique().tolist(), db)
+    votes = resolve_element_ids('Abstimmung', 'Abstimmungsnummer',
+                                df['RegistrationNumber'].dropna().unique().tolist(), db)
+    rows = pd.DataFrame({'person': df['PersonNumber'].map(persons),
+                         'vote': df['RegistrationNumber'].map(votes),
+                         'type': df['Decision'].clip(upper=3).map(VOTING_TYPES),
+                         'DecisionText': df['DecisionText']})
+    rows = rows.dropna(subset=['person', 'vote', 'type'])
+    for relationship, group in rows.groupby('type', sort=False):
+        conn.write_parallel(voting_query(relationship, create_only), group, partition_key='person', db=db)
+
+#Loading data about the voting of members of the Swiss parliament and storing it to a Neo4j database
+def voting(table, db, incremental=False, stream=False, create_only=False, **kwargs):
     """Loads table and stores selected entities, relationships and properties to
     the specified Neo4j database
     
@@ -421,6 +552,13 @@ def business(table, db, **kwargs):
         Name of the table
     db : str
         Name of the database
+    incremental : bool
+        Defines if only rows modified since the last incremental run should be loaded
+    stream : bool
+        Defines if the table should be stored page by page while it is downloaded
+    create_only : bool
+        Defines if the relationships are created instead of merged, only for loading
+        a legislature into a database without any votings
     kwargs : 
         Optional arguments for filtering the returned data
         
@@ -429,17 +567,55 @@ def business(table, db, **kwargs):
     str
         Completion message
     """
-    df = load_table(table, **kwargs)
+    if create_only and incremental:
+        raise ValueError("create_only would duplicate the votings of an incremental load")
+    mark = TableWatermark(db, table, enabled=incremental)
+    pages = load_pages(table, stream, delta_ttl(mark), columns=mark.columns(VOTING_COLUMNS), **mark.filters(kwargs))
+    for df in pages:
+        store_voting_page(df, db, create_only)
+        mark.advance(df)
+    mark.commit()
+    return print("Voting import finished")
+  
+#Columns of the Business table read by store_business_page
+BUSINESS_COLUMNS = ['ID', 'BusinessShortNumber', 'BusinessTypeName', 'Title', 'Description',
+                    'FederalCouncilProposalText', 'BusinessStatusText', 'BusinessStatusDate',
+                    'SubmissionDate', 'SubmissionLegislativePeriod', 'SubmissionSession', 'TagNames']
 
-    text_columns = ['Description', 'InitialSituation', 'Proceedings', 'SubmittedText', 
-                    'ReasonText', 'DocumentationText', 'MotionText', 'FederalCouncilResponseText',
-                    'FederalCouncilProposalText']
-    for column in text_columns:
-        df[column] = [clean_text(item, keep_punctuation=True) for item in df[column]]
+#Cleaning the texts of one page of the business table and splitting its tags
+def prepare_business_page(df):
+    """Cleans the stored text columns in place and returns one row per business and tag
+    
+    Parameters
+    ----------
+    df : Pandas dataframe
+        Rows of the business table
+        
+    Returns
+    -------
+    Pandas dataframe
+        Columns ID and TagNames with one tag per row
+    """
+    text_columns = ['Description', 'FederalCouncilProposalText']
+    clean_columns(df, text_columns, keep_punctuation=True)
 
     df_sub = df[['ID', 'TagNames']]
     df_sub.loc[:,'TagNames'] = df_sub.loc[:,'TagNames'].str.split('|')
-    df_sub = df_sub.explode('TagNames')
+    return df_sub.explode('TagNames')
+
+#Storing one page of the business table in a Neo4j database
+def store_business_page(df, db):
+    """Cleans the texts of a page of the business table and stores selected entities,
+    relationships and properties to the specified Neo4j database
+    
+    Parameters
+    ----------
+    df : Pandas dataframe
+        Rows of the business table
+    db : str
+        Name of the database
+    """
+    df_sub = prepare_business_page(df)
 
     queries = [
         '''
@@ -456,12 +632,6 @@ def business(table, db, **kwargs):
             g.Legislationsnummer_Einreichung = row.SubmissionLegislativePeriod
             RETURN count(*) as total
             ''',            
-            '''            
-            MATCH (t:Text)             
-            MATCH (g:Geschäft {Geschäftsnummer: t.ID})
-            MERGE (g)-[l:HAT_TEXT]->(t)
-            RETURN count(l) as total 
-            ''',            
             '''
             UNWIND $rows AS row
             MERGE (s:Session {Sessionsnummer: row.SubmissionSession})
@@ -472,7 +642,7 @@ def business(table, db, **kwargs):
             '''
     ]
     for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+        conn.write_batches(query, df, db=db)
 
     query = '''
             UNWIND $rows AS row
@@ -482,8 +652,76 @@ def business(table, db, **kwargs):
             MERGE (g)-[l:IST_TEIL_VON]->(t)
             RETURN count(t.Name) as total
             '''       
-    conn.query(query, parameters = {'rows':df_sub.to_dict('records')}, db=db)
+    conn.write_batches(query, df_sub, db=db)
+
+#Query linking businesses to their texts, which are stored by load_embed_store_docs independently of the business rows
+QUERY_BUSINESS_TEXT = '''
+            UNWIND $rows AS row
+            MATCH (g:Geschäft {Geschäftsnummer: row.ID})
+            WITH row, g
+            MATCH (t:Text {ID: row.ID})
+            MERGE (g)-[l:HAT_TEXT]->(t)
+            RETURN count(l) as total
+            '''
+
+#Linking businesses to the chunks of an equal text stored for another business or column
+QUERY_SHARED_TEXT = '''
+            UNWIND $rows AS row
+            MATCH (g:Geschäft {Geschäftsnummer: row.ID})
+            WITH row, g
+            MATCH (t:Text {ID: row.Text_ID})
+            WHERE t.Name = row.Text_Name
+            MERGE (g)-[l:HAT_TEXT]->(t)
+            RETURN count(l) as total
+            '''
+
+#Loading data about the businesses of the Swiss parliament and storing it to a Neo4j database
+def business(table, db, incremental=False, stream=False, force=False, sync=False, **kwargs):
+    """Loads table and stores selected entities, relationships and properties to
+    the specified Neo4j database, skipping businesses whose row did not change since
+    the last load
     
+    Parameters
+    ----------
+    table : str
+        Name of the table
+    db : str
+        Name of the database
+    incremental : bool
+        Defines if only rows modified since the last incremental run should be loaded
+    stream : bool
+        Defines if the table should be stored page by page while it is downloaded
+    force : bool
+        Defines if unchanged rows should be written as well
+    sync : bool
+        Defines if businesses stored by a previous load but missing in the table, e.g.
+        out of the filtered scope, are deleted after the load
+    kwargs : 
+        Optional arguments for filtering the returned data
+        
+    Returns
+    -------
+    str
+        Completion message
+    """
+    if sync and incremental:
+        raise ValueError("sync needs the complete table, an incremental load only returns modified rows")
+    mark = TableWatermark(db, table, enabled=incremental)
+    pages = load_pages(table, stream, delta_ttl(mark), columns=mark.columns(BUSINESS_COLUMNS), **mark.filters(kwargs))
+    key, hash_property = ('Geschäftsnummer', 'ID'), 'Hash_' + table
+    keys = set()
+    for df in pages:
+        keys |= column_keys(df, 'ID')
+        changed = changed_rows(conn, df, 'Geschäft', key, BUSINESS_COLUMNS, hash_property, db, force=force)
+        store_business_page(changed, db)
+        store_hashes(conn, changed, 'Geschäft', key, hash_property, db)
+        conn.write_batches(QUERY_BUSINESS_TEXT, df, db=db)
+        mark.advance(df)
+    mark.commit()
+    if os.path.exists(SHARED_TEXTS_FILE):
+        conn.write_batches(QUERY_SHARED_TEXT, pd.read_parquet(SHARED_TEXTS_FILE), db=db)
+    if sync:
+        sync_nodes(conn, 'Geschäft', 'Geschäftsnummer', keys, db, owner=hash_property)
     return print("Business import finished")
 
 #Loading data about the businesses of the Swiss parliament, which are already stored in the Neo4j database 
@@ -509,17 +747,13 @@ def load_table_business_in_db(table, db, language = 'DE', **kwargs):
     """
     query = '''
             MATCH (g:Geschäft)
+            WHERE g.Geschäftsnummer IS NOT NULL
             RETURN g.Geschäftsnummer
             '''       
     result = conn.query_values(query, db=db)
     lst = [item for row in result for item in row]
     
-    table_df = pd.DataFrame()
-    for nummer in lst:
-        tbl = spp.get_data(table, Language = language, BusinessNumber=nummer, **kwargs)
-        table_df = pd.concat([table_df, pd.DataFrame(tbl)], ignore_index=True)   
- 
-    return table_df
+    return fetch_in_chunks(load_table, table, 'BusinessNumber', lst, language=language, **kwargs)
 
 #Load, clean, chunk various texts describing businesses and return them as Langchain documents
 def load_process_business_texts(table, **kwargs):
@@ -534,10 +768,11 @@ def load_process_business_texts(table, **kwargs):
         
     Returns
     -------
-    list
-        List of processed documents
+    tuple
+        Generator of the processed documents, one per chunk of every distinct text, and
+        Pandas dataframe linking businesses to the text of another owner they share
     """
-    df = load_table_business(table, **kwargs)
+    df = load_table(table, **kwargs)
     df.rename(columns={'Description': 'Beschreibung', 
                        'InitialSituation': 'Ausgangssituation',
                        'Proceedings': 'Verhandlungen',
@@ -551,23 +786,10 @@ def load_process_business_texts(table, **kwargs):
     text_columns = ['Beschreibung', 'Ausgangssituation', 'Verhandlungen', 'Einreichungstext', 
                     'Begründungstext', 'Dokumentationstext', 'Motionstext', 'Antwort_Bundesrat',
                     ]
-    for column in text_columns:
-        df[column] = [clean_text(item, keep_punctuation=True) for item in df[column]]
-
-    text_splitter = CharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=512, chunk_overlap=20)
+    clean_columns(df, text_columns, keep_punctuation=True, workers=os.cpu_count())
+    unique, duplicates = dedup_texts(df, text_columns)
 
-    g_dict = pd.DataFrame(df['ID']).to_dict(orient='records')
-
-    docs = []
-    for column in text_columns:
-        temp = text_splitter.create_documents(
-            texts=df[column],
-            metadatas=[dict(item, Name=column) for item in g_dict]
-        )
-        docs.append(temp)
-    
-    return [x for xx in docs for x in xx]
+    return iter_chunks(text_documents(unique), workers=os.cpu_count()), duplicates
 
 #Storing Langchain documents in Neo4j database and Index them as Vector
 def store_docs_in_neo4j(documents, db):
@@ -580,28 +802,7 @@ def store_docs_in_neo4j(documents, db):
     db : str
         Name of the database
     """
-    # Neo4j DBMS credentials
-    url=os.getenv('NEO4J_url')
-    username = os.getenv('NEO4J_user')
-    password = os.getenv('NEO4J_pwd')
-
-    # OpenAI credentials
-    openai_api_secret_key = os.getenv('OPENAI_API_KEY')
-
-    # Instantiate Neo4j vector from documents
-    Neo4jVector.from_documents(
-        documents,
-        OpenAIEmbeddings(openai_api_key=openai_api_secret_key),
-        database=db,
-        url=url,
-        username=username,
-        password=password,
-        index_name="geschäfte",  
-        node_label="Text", 
-        text_node_property="info", 
-        embedding_node_property="vector",
-        create_id_index=True 
-    )
+    store_documents(documents, db, index_name="geschäfte")
 
 #Load, embed and store business texts in Neo4j database
 def load_embed_store_docs(table, db, **kwargs):
@@ -610,8 +811,10 @@ def load_embed_store_docs(table, db, **kwargs):
             f"\nLoad data from Parlament and store OpenAI embeddings in a Neo4j Vector\n\t"
         )
 
-        processed_docs = load_process_business_texts(table, **kwargs)
-        store_docs_in_neo4j(processed_docs, db)
+        processed_docs, duplicates = load_process_business_texts(table, **kwargs)
+        for documents in iter_batches(processed_docs, STORE_BATCH_SIZE):
+            store_docs_in_neo4j(documents, db)
+        duplicates.to_parquet(SHARED_TEXTS_FILE, index=False)
 
     except Exception as e:
         print(f"\n\tAn unexpected error occurred: {e}")
@@ -640,7 +843,7 @@ def BusinessRole(table, db, **kwargs):
         '''
             UNWIND $rows AS row
             WITH row
-            WHERE row.ParlGroupNumnber <> 0
+            WHERE row.ParlGroupNumber <> 0
             MERGE (g:Geschäft {Geschäftsnummer: row.BusinessNumber})
             WITH row, g
             MATCH (f:Fraktion {Fraktionsnummer: row.ParlGroupNumber})
@@ -727,7 +930,7 @@ def BusinessRole(table, db, **kwargs):
             '''
     ]
     for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+        conn.write_parallel(query, df, partition_key='BusinessNumber', db=db)
     return print("BusinessRole import finished")
 
 #Loading data about the relationship between businesses and storing it to a Neo4j database
@@ -761,7 +964,7 @@ def related_business(table, db, **kwargs):
             '''     
     ]
     for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+        conn.write_batches(query, df, db=db)
     return print("RelatedBusiness import finished")
 
 #Loading data about the departements and their responsibility for businesses and storing it to a Neo4j database
@@ -798,7 +1001,7 @@ def business_responsibility(table, db, **kwargs):
             '''     
     ]
     for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+        conn.write_batches(query, df, db=db)
     return print("BusinessResponsibility import finished")
 
 #Loading data about the bills that are being adressed in Parliament and storing it to a Neo4j database
@@ -836,24 +1039,20 @@ def bill(table, db, **kwargs):
             '''     
     ]
     for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+        conn.write_batches(query, df, db=db)
     return print("Bill import finished")
 
 #Loading data about the bills, which are already in the Neo4j database
 def load_table_bill_in_db(table, db, language = 'DE', **kwargs):
     query = '''
             MATCH (g:Gesetz)
+            WHERE g.Gesetzesnummer IS NOT NULL
             RETURN g.Gesetzesnummer
             '''       
     result = conn.query_values(query, db=db)
     lst = [item for row in result for item in row]
     
-    table_df = pd.DataFrame()
-    for nummer in lst:
-        tbl = spp.get_data(table, Language = language, IdBill=nummer, **kwargs)
-        table_df = pd.concat([table_df, pd.DataFrame(tbl)], ignore_index=True)   
- 
-    return table_df
+    return fetch_in_chunks(load_table, table, 'IdBill', lst, language=language, **kwargs)
 
 #Loading data about the decision regardings the bills and storing it to a Neo4j database
 def resolution(table, db, **kwargs):
@@ -902,24 +1101,20 @@ def resolution(table, db, **kwargs):
             '''
     ]
     for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+        conn.write_batches(query, df, db=db)
     return print("Resolution import finished")
 
 #Loading data about sessions of the Parliament, which are already in the Neo4j database
 def load_table_session_in_db(table, db, language = 'DE', **kwargs):
     query = '''
             MATCH (s:Session)
+            WHERE s.Sessionsnummer IS NOT NULL
             RETURN s.Sessionsnummer
             '''       
     result = conn.query_values(query, db=db)
     lst = [item for row in result for item in row]
     
-    table_df = pd.DataFrame()
-    for nummer in lst:
-        tbl = spp.get_data(table, Language = language, ID=nummer, **kwargs)
-        table_df = pd.concat([table_df, pd.DataFrame(tbl)], ignore_index=True)   
- 
-    return table_df
+    return fetch_in_chunks(load_table, table, 'ID', lst, language=language, **kwargs)
 
 #Loading data about the sessions of the parliament and storing it to a Neo4j database
 def session(table, db, **kwargs):
@@ -954,6 +1149,6 @@ def session(table, db, **kwargs):
             '''     
     ]
     for query in queries:
-        conn.query(query, parameters = {'rows':df.to_dict('records')}, db=db)
+        conn.write_batches(query, df, db=db)
     return print("Session import finished")
 
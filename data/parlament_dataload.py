@@ -1,5 +1,9 @@
 import os
+from functools import partial
 from utils.neo4j_python_connection import Neo4jConnection
+from utils.scheduler import Stage, run_stages
+from utils.schema import ensure_schema
+from utils.chunking import start_chunk_pool, stop_chunk_pool
 import parlament_class as pc
 from datetime import datetime
 
@@ -11,76 +15,67 @@ conn = Neo4jConnection(uri=os.getenv('NEO4J_url'),
 #Define database
 db = "swissparlgraph"
 
-#Set database constraints to ensure uniqueness of entities
-conn.query('CREATE CONSTRAINT person IF NOT EXISTS FOR (p:Person) REQUIRE p.Personennummer IS UNIQUE',
-           db=db)
-conn.query('CREATE CONSTRAINT party IF NOT EXISTS FOR (g:Partei) REQUIRE g.Parteinummer IS UNIQUE',
-           db=db)
-conn.query('CREATE CONSTRAINT Rat IF NOT EXISTS FOR (r:Rat) REQUIRE r.Ratnummer IS UNIQUE',
-           db=db)
-conn.query('CREATE CONSTRAINT Kanton IF NOT EXISTS FOR (k:Kanton) REQUIRE k.Kantonsnummer IS UNIQUE',
-           db=db)
-conn.query('CREATE CONSTRAINT Fraktion IF NOT EXISTS FOR (f:Fraktion) REQUIRE f.Fraktionsnummer IS UNIQUE',
-           db=db)
-conn.query('CREATE CONSTRAINT Kommission IF NOT EXISTS FOR (k:Kommission) REQUIRE k.Kommissionsnummer IS UNIQUE',
-           db=db)
-conn.query('CREATE CONSTRAINT Abstimmung IF NOT EXISTS FOR (a:Abstimmung) REQUIRE a.Abstimmungsnummer IS UNIQUE',
-           db=db)
-conn.query('CREATE CONSTRAINT Geschäft IF NOT EXISTS FOR (g:Geschäft) REQUIRE g.Geschäftsnummer IS UNIQUE',
-           db=db)
-conn.query('CREATE CONSTRAINT Session IF NOT EXISTS FOR (s:Session) REQUIRE s.Sessionsnummer IS UNIQUE',
-           db=db)
-conn.query('CREATE CONSTRAINT Gesetz IF NOT EXISTS FOR (g:Gesetz) REQUIRE g.Gesetzesnummer IS UNIQUE',
-           db=db)
-
-
-#Run imports as defined in parlament_class.py 
-tx = pc.membercouncil('MemberCouncil', db=db, Active = True)
-print(tx)
-
-tx = pc.person_occupation('PersonOccupation', db=db)
-print(tx)
-
-tx = pc.person_address('PersonAddress', db=db)
-print(tx)
-
-tx = pc.citizenship('Citizenship', db=db)
-print(tx)
-
-tx = pc.member_committee('MemberCommittee', db=db)
-print(tx)
- 
-tx = pc.committee('Committee', db=db)
-print(tx)
-
-#Filter businesses that had a status change in the current legislation
-tx = pc.load_embed_store_docs('Business', db=db, BusinessStatusDate__gt=datetime.fromisoformat('2023-12-03 23:00:00 Z'))
-print(tx)
-
-#Filter businesses that had a status change in the current legislation
-tx = pc.business('Business', db=db, BusinessStatusDate__gt=datetime.fromisoformat('2023-12-03 23:00:00 Z'))
-print(tx)
-
-tx = pc.vote('Vote', db=db, IdLegislativePeriod=52)
-print(tx)
-
-tx = pc.voting('Voting', db=db, IdLegislativePeriod=52)
-print(tx)
-
-tx = pc.BusinessRole('BusinessRole', db=db)
-print(tx)
-
-tx = pc.related_business('RelatedBusiness', db=db)
-print(tx)
-
-tx = pc.business_responsibility('BusinessResponsibility', db=db)
-print(tx)
-
-tx = pc.session('Session', db=db)
-print(tx)
-
-tx = pc.bill('Bill', db=db)
-print(tx)
-
-tx = pc.resolution('Resolution', db=db)
+#Only load businesses, votes and votings modified since the last run if SPP_INCREMENTAL is set
+incremental = os.getenv('SPP_INCREMENTAL', '').lower() in ('1', 'true')
+
+#Store businesses and votings page by page while they are downloaded if SPP_STREAM is set
+stream = os.getenv('SPP_STREAM', '').lower() in ('1', 'true')
+
+#Create votings without merging if SPP_VOTING_CREATE_ONLY is set, only for a legislature not loaded yet
+voting_create_only = os.getenv('SPP_VOTING_CREATE_ONLY', '').lower() in ('1', 'true')
+
+#Delete businesses and committee memberships missing in the loaded tables if SPP_SYNC is set
+sync = os.getenv('SPP_SYNC', '').lower() in ('1', 'true')
+
+#Create the constraints and indexes of all lookup keys declared in utils/schema.py
+ensure_schema(conn, db)
+
+
+#Run imports as defined in parlament_class.py, each stage declares the node labels it requires and produces
+business_filter = {'BusinessStatusDate__gt': datetime.fromisoformat('2023-12-03 23:00:00 Z')}
+
+stages = [
+    Stage('MemberCouncil', partial(pc.membercouncil, 'MemberCouncil', db=db, Active = True),
+          produces=['Person', 'Parlamentarier', 'Partei', 'Rat', 'Kanton', 'Fraktion']),
+    Stage('PersonOccupation', partial(pc.person_occupation, 'PersonOccupation', db=db),
+          requires=['Person']),
+    Stage('PersonAddress', partial(pc.person_address, 'PersonAddress', db=db),
+          requires=['Person']),
+    Stage('Citizenship', partial(pc.citizenship, 'Citizenship', db=db),
+          requires=['Person']),
+    Stage('MemberCommittee', partial(pc.member_committee, 'MemberCommittee', db=db, sync=sync),
+          requires=['Person'], produces=['Kommission']),
+    Stage('Committee', partial(pc.committee, 'Committee', db=db),
+          requires=['Kommission', 'Rat']),
+    #Filter businesses that had a status change in the current legislation
+    Stage('BusinessTexts', partial(pc.load_embed_store_docs, 'Business', db=db, **business_filter),
+          produces=['Text']),
+    Stage('Business', partial(pc.business, 'Business', db=db, incremental=incremental, stream=stream,
+                                sync=sync, **business_filter),
+          requires=['Text'], produces=['Geschäft', 'Session', 'Thema']),
+    Stage('Vote', partial(pc.vote, 'Vote', db=db, incremental=incremental, IdLegislativePeriod=52),
+          produces=['Abstimmung', 'Session', 'Geschäft']),
+    Stage('Voting', partial(pc.voting, 'Voting', db=db, incremental=incremental, stream=stream,
+                              create_only=voting_create_only, IdLegislativePeriod=52),
+          requires=['Person', 'Abstimmung']),
+    Stage('BusinessRole', partial(pc.BusinessRole, 'BusinessRole', db=db),
+          requires=['Geschäft', 'Fraktion', 'Kanton', 'Kommission', 'Person'], produces=['Geschäft']),
+    Stage('RelatedBusiness', partial(pc.related_business, 'RelatedBusiness', db=db),
+          requires=['Geschäft']),
+    Stage('BusinessResponsibility', partial(pc.business_responsibility, 'BusinessResponsibility', db=db),
+          requires=['Geschäft'], produces=['Departement']),
+    Stage('Session', partial(pc.session, 'Session', db=db),
+          requires=['Session'], produces=['Session']),
+    Stage('Bill', partial(pc.bill, 'Bill', db=db),
+          requires=['Geschäft'], produces=['Gesetz']),
+    Stage('Resolution', partial(pc.resolution, 'Resolution', db=db),
+          requires=['Gesetz', 'Rat', 'Kommission']),
+]
+
+#Fork the chunking workers before the stages run on threads, the text stages split their documents in them
+start_chunk_pool(os.cpu_count())
+try:
+    tx = run_stages(stages, workers=int(os.getenv('SPP_STAGE_WORKERS', 4)))
+finally:
+    stop_chunk_pool()
 print(tx)
@@ -0,0 +1,199 @@
+import os
+import shlex
+import pandas as pd
+
+#Import types of pandas dtype kinds, all other columns are written as string
+DTYPE_TYPES = {'i': 'long', 'u': 'long', 'f': 'double', 'b': 'boolean', 'M': 'datetime'}
+
+#Delimiter of array values and labels, the default of neo4j-admin
+ARRAY_DELIMITER = ';'
+
+#Import type of a column, integer columns turned into floats by missing values stay integers
+def import_type(series):
+    if series.dtype.kind == 'f' and (series.dropna() % 1 == 0).all():
+        return 'long'
+    return DTYPE_TYPES.get(series.dtype.kind, 'string')
+
+#Format the values of a column as expected by neo4j-admin for the given type
+def format_column(series, type):
+    if type == 'date':
+        return pd.to_datetime(series, errors='coerce').dt.strftime('%Y-%m-%d')
+    if type == 'datetime':
+        return pd.to_datetime(series, errors='coerce', utc=True).dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+    if type == 'long' and series.dtype.kind == 'f':
+        return series.astype('Int64')
+    if type.endswith('[]'):
+        return series.map(lambda values: ARRAY_DELIMITER.join(map(str, values))
+                          if isinstance(values, (list, tuple)) else None)
+    return series
+
+#IDs are written as text, integral floats without decimals so that 123.0 and 123 refer to the same node
+def id_tokens(series):
+    return series.astype(object).map(lambda value: None if pd.isna(value)
+                      else str(int(value)) if isinstance(value, float) and value.is_integer()
+                      else str(value))
+
+#Collects node and relationship files for an offline import with neo4j-admin
+class BulkImport:
+    """Writes node and relationship files with typed header files for
+    'neo4j-admin database import full'
+
+    Nodes are collected per label (or ID space) and written by finish(), the properties of
+    a node written by several calls are combined and later non-empty values win as with
+    SET. Relationships are written to one file per call and type, once per start and end
+    node as with MERGE, and only between nodes written before, as MATCH would skip them.
+    """
+
+    def __init__(self, directory):
+        """
+        Parameters
+        ----------
+        directory : str
+            Directory of the import files, created if it does not exist
+        """
+        self.directory = directory
+        self.files = {}
+        self.ids = {}
+        self.pairs = {}
+        self.__nodes = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def __write(self, kind, name, df):
+        if name not in self.files:
+            header = os.path.join(self.directory, f"{name}_header.csv")
+            pd.DataFrame(columns=df.columns).to_csv(header, index=False)
+            self.files[name] = (kind, list(df.columns), [header])
+        _, columns, paths = self.files[name]
+        if list(df.columns) != columns:
+            raise ValueError(f"Columns {list(df.columns)} differ from the header of {name}: {columns}")
+        if df.empty:
+            return 0
+        path = os.path.join(self.directory, f"{name}_part{len(paths)}.csv")
+        df.to_csv(path, index=False, header=False)
+        paths.append(path)
+        return len(df)
+
+    def __properties(self, df, properties, types):
+        columns = {}
+        for name, column in properties.items():
+            type = (types or {}).get(name) or import_type(df[column])
+            columns[f"{name}:{type}"] = format_column(df[column], type)
+        return columns
+
+    def nodes(self, label, df, key, properties=None, types=None, id_space=None, extra_labels=None, existing=False):
+        """Collects the nodes of a label
+
+        Parameters
+        ----------
+        label : str
+            Label of the nodes
+        df : Pandas dataframe
+            One row per node
+        key : tuple
+            Key property and the column holding its values, e.g. ('Personennummer', 'ID')
+        properties : dict
+            Column per property
+        types : dict
+            Import type per property, e.g. 'date', overriding the type derived from the dtype
+        id_space : str
+            Name of the ID space relationships refer to, defaults to the label
+        extra_labels : str
+            Optional column with additional labels separated by ';'
+        existing : bool
+            Defines if only nodes collected before are updated, as SET after MATCH
+
+        Returns
+        -------
+        int
+            Number of collected rows
+        """
+        id_space = id_space or label
+        key_property, key_column = key
+        ids = id_tokens(df[key_column])
+        keep = ids.isin(self.ids.get(id_space, set())) if existing else ids.notna()
+        df, ids = df[keep], ids[keep]
+        self.ids.setdefault(id_space, set()).update(ids)
+        columns = {f":ID({id_space})": ids}
+        columns.update(self.__properties(df, {key_property: key_column, **(properties or {})}, types))
+        labels = pd.Series(label, index=df.index)
+        if extra_labels is not None:
+            labels = labels.where(df[extra_labels].fillna('') == '',
+                                  label + ARRAY_DELIMITER + df[extra_labels].fillna(''))
+        columns[":LABEL"] = labels
+        self.__nodes.setdefault(id_space, []).append(pd.DataFrame(columns))
+        return len(df)
+
+    def relationships(self, type, df, start, end, properties=None, types=None):
+        """Writes relationships between collected nodes, once per start and end node
+
+        Parameters
+        ----------
+        type : str
+            Relationship type
+        df : Pandas dataframe
+            One row per relationship
+        start : tuple
+            ID space and column of the start nodes, e.g. ('Person', 'PersonNumber')
+        end : tuple
+            ID space and column of the end nodes
+        properties : dict
+            Column per property
+        types : dict
+            Import type per property, overriding the type derived from the dtype
+
+        Returns
+        -------
+        int
+            Number of written relationships
+        """
+        (start_space, start_column), (end_space, end_column) = start, end
+        name = f"{type}_{start_space}_{end_space}"
+        start_ids, end_ids = id_tokens(df[start_column]), id_tokens(df[end_column])
+        pairs = start_ids + '\x1f' + end_ids
+        written = self.pairs.setdefault(name, set())
+        keep = (start_ids.isin(self.ids.get(start_space, set()))
+                & end_ids.isin(self.ids.get(end_space, set()))
+                & ~pairs.isin(written) & ~pairs.duplicated())
+        written.update(pairs[keep])
+        df = df[keep]
+        columns = {f":START_ID({start_space})": start_ids[keep], f":END_ID({end_space})": end_ids[keep]}
+        columns.update(self.__properties(df, properties or {}, types))
+        columns[":TYPE"] = pd.Series(type, index=df.index)
+        return self.__write('relationships', name, pd.DataFrame(columns))
+
+    def finish(self, database):
+        """Writes the collected nodes and returns the neo4j-admin command importing all
+        files into a new database
+
+        Parameters
+        ----------
+        database : str
+            Name of the database
+
+        Returns
+        -------
+        str
+            Shell command
+        """
+        for id_space, frames in self.__nodes.items():
+            df = pd.concat(frames, ignore_index=True)
+            properties = [column for column in df.columns if not column.startswith(':')]
+            names = [column.split(':')[0] for column in properties]
+            if len(set(names)) < len(names):
+                raise ValueError(f"Properties of {id_space} are written with different types: {properties}")
+            id_column = f":ID({id_space})"
+            nodes = df.groupby(id_column, sort=False)[properties].last()
+            # Integer properties missing in some of the frames became floats when concatenated
+            for column in properties:
+                if column.endswith(':long') and nodes[column].dtype.kind == 'f':
+                    nodes[column] = nodes[column].astype('Int64')
+            nodes[":LABEL"] = df.groupby(id_column, sort=False)[":LABEL"].agg(
+                lambda labels: ARRAY_DELIMITER.join(dict.fromkeys(
+                    label for value in labels for label in value.split(ARRAY_DELIMITER))))
+            self.__write('nodes', id_space, nodes.reset_index())
+        self.__nodes = {}
+        args = ['neo4j-admin', 'database', 'import', 'full', '--overwrite-destination=true',
+                '--multiline-fields=true']
+        for kind, _, paths in self.files.values():
+            args.append(f"--{kind}={','.join(paths)}")
+        return shlex.join(args + [database])
@@ -0,0 +1,131 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from langchain.text_splitter import CharacterTextSplitter
+from .neo4j_python_connection import iter_batches
+from .utils import fork_safe_workers
+
+#Chunking strategy of all text ingestors, sizes in tokens. ENCODING is the default of
+#CharacterTextSplitter.from_tiktoken_encoder, so the chunks stay the same
+CHUNK_SIZE = 512
+CHUNK_OVERLAP = 20
+ENCODING = 'gpt2'
+
+#Number of chunks the ingestors embed and store at once while the chunks are streamed
+STORE_BATCH_SIZE = 1000
+
+#Number of distinct strings whose token length is kept per process
+TOKEN_CACHE_SIZE = 100000
+
+#Encoder and splitter of this process, created on first use
+_encoder = None
+_splitter = None
+
+#Worker processes forked by start_chunk_pool, used by iter_chunks from any thread
+_pool = None
+_pool_workers = 0
+
+#Tiktoken encoder shared by all splits of this process
+def encoder():
+    global _encoder
+    if _encoder is None:
+        import tiktoken
+        _encoder = tiktoken.get_encoding(ENCODING)
+    return _encoder
+
+#Number of tokens of a text, cached for separators and recurring paragraphs
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def token_length(text):
+    return len(encoder().encode(text, allowed_special=set(), disallowed_special="all"))
+
+#Splitter counting tokens with the shared encoder and cache
+def text_splitter():
+    global _splitter
+    if _splitter is None:
+        _splitter = CharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+                                          length_function=token_length)
+    return _splitter
+
+#Split a batch of documents, run in the worker processes of iter_chunks
+def split_batch(documents):
+    return text_splitter().split_documents(documents)
+
+#Fork the worker processes of iter_chunks while this is the only thread
+def start_chunk_pool(workers):
+    """Starts worker processes for iter_chunks before other threads run, e.g. before
+    utils/scheduler.py starts its stages. Forking inside a stage could deadlock the child,
+    a pool forked beforehand is used by iter_chunks from every stage instead
+
+    Parameters
+    ----------
+    workers : int
+        Number of worker processes
+
+    Returns
+    -------
+    int
+        Number of running worker processes, 0 if other threads are already running
+    """
+    global _pool, _pool_workers
+    workers = fork_safe_workers(workers)
+    if _pool is None and workers and workers > 1:
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork'))
+        # The first task forks all workers of a fork context at once
+        pool.submit(int).result()
+        _pool, _pool_workers = pool, workers
+    return _pool_workers
+
+#Stop the worker processes started by start_chunk_pool
+def stop_chunk_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown()
+        _pool, _pool_workers = None, 0
+
+#Submit batches to a pool and yield their chunks in input order
+def ordered_chunks(pool, batches, depth):
+    pending = deque()
+    for batch in batches:
+        pending.append(pool.submit(split_batch, batch))
+        if len(pending) >= depth:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+#Split documents into chunks in worker processes and yield the chunks in input order
+def iter_chunks(documents, workers=None, batch_size=64, queue_depth=None):
+    """Splits documents into chunks of at most CHUNK_SIZE tokens. Batches of documents are
+    split in worker processes while earlier chunks are consumed, at most queue_depth
+    batches are in flight. Uses the pool of start_chunk_pool if it is running, else
+    forks a pool for this call
+
+    Parameters
+    ----------
+    documents : iterable
+        Langchain documents, may be a generator
+    workers : int
+        Optional number of worker processes, defaults to splitting in this process. Without
+        start_chunk_pool ignored while other threads are running, e.g. inside a stage of
+        utils/scheduler.py
+    batch_size : int
+        Number of documents per task of a worker process
+    queue_depth : int
+        Maximum number of batches in flight, defaults to twice the number of workers
+
+    Returns
+    -------
+    generator
+        Langchain documents, one per chunk, with the metadata of their document
+    """
+    batches = iter_batches(documents, batch_size)
+    if workers and workers > 1 and _pool is not None:
+        yield from ordered_chunks(_pool, batches, queue_depth or 2 * _pool_workers)
+        return
+    workers = fork_safe_workers(workers)
+    if not workers or workers < 2:
+        for batch in batches:
+            yield from split_batch(batch)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        yield from ordered_chunks(pool, batches, queue_depth or 2 * workers)
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+#Local SQLite file keeping the embeddings of all pipelines and the RAG queries
+CACHE_FILE = os.getenv('SPP_EMBEDDING_CACHE', '.spp_embeddings.sqlite')
+
+#Size of the stored vectors above which the least recently used ones are evicted, defaults to 2 GB
+CACHE_MAX_BYTES = int(os.getenv('SPP_EMBEDDING_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
+#Number of hashes per SQLite statement, below the limit of bound variables
+LOOKUP_CHUNK = 500
+
+#Hash identifying a text in the cache
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+#Persistent embeddings keyed by model and text hash
+class EmbeddingCache:
+    """Stores embeddings as float32 blobs in a SQLite file, keyed by model name and the
+    hash of the embedded text. Counts hits and misses and evicts the least recently used
+    vectors once they exceed max_bytes
+
+    Parameters
+    ----------
+    path : str
+        SQLite file, defaults to CACHE_FILE
+    max_bytes : int
+        Maximum size of the stored vectors, defaults to CACHE_MAX_BYTES
+    """
+    def __init__(self, path=CACHE_FILE, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                used REAL NOT NULL,
+                PRIMARY KEY (model, hash))
+            ''')
+        self.__db.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+        self.__db.commit()
+        self.__bytes = self.__db.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    def get(self, model, texts):
+        """Looks up the embeddings of texts
+
+        Parameters
+        ----------
+        model : str
+            Name of the embedding model
+        texts : list
+            Texts to look up
+
+        Returns
+        -------
+        list
+            Embedding of every text as list of floats, None for texts not in the cache
+        """
+        hashes = [text_hash(text) for text in texts]
+        found = {}
+        now = time.time()
+        with self.__lock:
+            unique = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique), LOOKUP_CHUNK):
+                chunk = unique[start:start + LOOKUP_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                found.update(self.__db.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({marks})",
+                    [model, *chunk]).fetchall())
+                self.__db.execute(f"UPDATE embeddings SET used = ? WHERE model = ? AND hash IN ({marks})",
+                                  [now, model, *chunk])
+            self.__db.commit()
+            vectors = [np.frombuffer(found[h], dtype=np.float32).tolist() if h in found else None
+                       for h in hashes]
+            hits = sum(vector is not None for vector in vectors)
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return vectors
+
+    def put(self, model, texts, vectors):
+        """Stores the embeddings of texts and evicts old vectors if the cache is full
+
+        Parameters
+        ----------
+        model : str
+            Name of the embedding model
+        texts : list
+            Embedded texts
+        vectors : list
+            Embedding of every text
+        """
+        now = time.time()
+        rows = [(model, text_hash(text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+                for text, vector in zip(texts, vectors)]
+        with self.__lock:
+            for row in rows:
+                cursor = self.__db.execute("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)", row)
+                self.__bytes += len(row[2]) * cursor.rowcount
+            self.__db.commit()
+            if self.__bytes > self.max_bytes:
+                self.__evict()
+
+    #Delete the least recently used vectors until the cache is at 90% of max_bytes
+    def __evict(self):
+        excess = self.__bytes - int(self.max_bytes * 0.9)
+        evicted = []
+        for rowid, size in self.__db.execute("SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY used"):
+            if excess <= 0:
+                break
+            evicted.append(rowid)
+            excess -= size
+            self.__bytes -= size
+        for start in range(0, len(evicted), LOOKUP_CHUNK):
+            chunk = evicted[start:start + LOOKUP_CHUNK]
+            self.__db.execute(f"DELETE FROM embeddings WHERE rowid IN ({','.join('?' * len(chunk))})", chunk)
+        self.__db.commit()
+        print("Embedding cache: evicted", len(evicted), "vectors")
+
+    def stats(self):
+        """Returns hits, misses, hit rate, number of vectors and their size in bytes"""
+        with self.__lock:
+            entries = self.__db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / lookups if lookups else 0.0,
+                    'entries': entries, 'bytes': self.__bytes}
+
+#Cache shared by all embedders of this process, opened on first use
+_cache = None
+_cache_lock = threading.Lock()
+
+def shared_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
+
+#Embedding model answering from the cache and embedding only the missing texts
+class CachedEmbeddings(Embeddings):
+    """Wraps a Langchain embedding model, e.g. OpenAIEmbeddings, so that texts embedded
+    before by any pipeline are read from the cache instead of being sent to the API
+
+    Parameters
+    ----------
+    embeddings : Embeddings
+        Embedding model used for texts missing in the cache
+    cache : EmbeddingCache
+        Optional cache, defaults to the shared cache of the process
+    model : str
+        Optional name of the model in the cache, defaults to the model of embeddings
+    """
+    def __init__(self, embeddings, cache=None, model=None):
+        self.embeddings = embeddings
+        self.cache = cache or shared_cache()
+        self.model = model or getattr(embeddings, 'model', type(embeddings).__name__)
+
+    def embed_documents(self, texts):
+        vectors = self.cache.get(self.model, texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            embedded = self.embeddings.embed_documents(missing)
+            self.cache.put(self.model, missing, embedded)
+            embedded = dict(zip(missing, embedded))
+            vectors = [embedded[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return vectors
+
+    def embed_query(self, text):
+        vector, = self.cache.get(self.model, [text])
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(self.model, [text], [vector])
+        return vector
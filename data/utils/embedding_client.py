@@ -0,0 +1,139 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import openai
+from openai import OpenAI
+from tqdm import tqdm
+from .embedding_cache import shared_cache
+
+#Limits of a request to the OpenAI embeddings endpoint, tokens per input and inputs per request
+MAX_INPUT_TOKENS = 8191
+MAX_BATCH_INPUTS = 2048
+
+#Tokens packed into one request and number of requests in flight
+MAX_BATCH_TOKENS = int(os.getenv('SPP_EMBEDDING_BATCH_TOKENS', 100000))
+EMBEDDING_CONCURRENCY = int(os.getenv('SPP_EMBEDDING_CONCURRENCY', 4))
+
+#Errors after which a request is repeated with backoff, at most MAX_RETRIES times
+RETRY_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError,
+                openai.InternalServerError)
+MAX_RETRIES = 8
+
+#OpenAI client shared by all requests of this process, retries are handled by embed_batch
+_client = None
+_client_lock = threading.Lock()
+
+def openai_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAI(max_retries=0)
+        return _client
+
+#Seconds to wait before repeating a failed request, the retry-after header of a rate limit wins
+def retry_delay(error, attempt):
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return min(60, 2 ** attempt) * (0.5 + random.random())
+
+#Embed one batch of texts with a single request
+def embed_batch(texts, model, max_retries=MAX_RETRIES):
+    for attempt in range(max_retries + 1):
+        try:
+            response = openai_client().embeddings.create(input=texts, model=model)
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        except RETRY_ERRORS as e:
+            if attempt == max_retries:
+                raise
+            delay = retry_delay(e, attempt)
+            print(f"Embedding request failed ({type(e).__name__}), retry in {delay:.1f}s")
+            time.sleep(delay)
+
+#Group texts into requests of at most max_tokens tokens and max_inputs inputs, in input order
+def pack_batches(texts, model, max_tokens=MAX_BATCH_TOKENS, max_inputs=MAX_BATCH_INPUTS):
+    """Counts the tokens of every text with the tokenizer of the model and packs
+    consecutive texts into batches. Texts longer than MAX_INPUT_TOKENS are truncated to
+    the tokens the endpoint accepts
+
+    Parameters
+    ----------
+    texts : list
+        Texts to embed
+    model : str
+        Name of the embedding model
+    max_tokens : int
+        Maximum number of tokens per batch
+    max_inputs : int
+        Maximum number of texts per batch
+
+    Returns
+    -------
+    generator
+        Lists of (text, input) pairs, input is the text as sent to the endpoint
+    """
+    import tiktoken
+    encoding = tiktoken.encoding_for_model(model)
+    batch, tokens = [], 0
+    for text in texts:
+        encoded = encoding.encode(text, disallowed_special=())
+        if len(encoded) > MAX_INPUT_TOKENS:
+            encoded = encoded[:MAX_INPUT_TOKENS]
+            batch_input = encoding.decode(encoded)
+        else:
+            batch_input = text
+        if batch and (tokens + len(encoded) > max_tokens or len(batch) == max_inputs):
+            yield batch
+            batch, tokens = [], 0
+        batch.append((text, batch_input))
+        tokens += len(encoded)
+    if batch:
+        yield batch
+
+#Embed many texts with packed, concurrent requests and checkpoint every finished request
+def embed_texts(texts, model, concurrency=EMBEDDING_CONCURRENCY, cache=None, **kwargs):
+    """Embeds texts with requests packed up to the token budget of the endpoint, of which
+    at most concurrency run at the same time. Rate limits and transient errors are
+    retried with backoff. Every finished request is stored in the embedding cache, so a
+    run that stopped resumes with the texts not embedded yet
+
+    Parameters
+    ----------
+    texts : list
+        Texts to embed
+    model : str
+        Name of the embedding model
+    concurrency : int
+        Maximum number of requests in flight, defaults to EMBEDDING_CONCURRENCY
+    cache : EmbeddingCache
+        Optional cache, defaults to the shared cache of the process
+    kwargs :
+        Optional token and input limits of pack_batches
+
+    Returns
+    -------
+    list
+        Embedding of every text, in the order of texts
+    """
+    cache = cache or shared_cache()
+    vectors = cache.get(model, texts)
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+    print(f"Embeddings: {len(texts) - sum(vector is None for vector in vectors)} of {len(texts)} "
+          f"from the cache, {len(missing)} distinct texts to embed")
+    batches = list(pack_batches(missing, model, **kwargs))
+    embedded = {}
+    pool = ThreadPoolExecutor(concurrency)
+    try:
+        futures = {pool.submit(embed_batch, [batch_input for _, batch_input in batch], model): batch
+                   for batch in batches}
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            batch = [text for text, _ in futures[future]]
+            batch_vectors = future.result()
+            cache.put(model, batch, batch_vectors)
+            embedded.update(zip(batch, batch_vectors))
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return [embedded[text] if vector is None else vector for text, vector in zip(texts, vectors)]
@@ -0,0 +1,162 @@
+#Share of the graph a single sync may delete before it is treated as an incomplete snapshot
+MAX_DELETE_SHARE = 0.5
+
+#Keys of the nodes of a label, restricted to the nodes written by one loader
+def graph_keys(conn, label, key_property, db, owner=None):
+    """Reads the key of every node of a label
+
+    Parameters
+    ----------
+    conn : Neo4jConnection
+        Connection to the DBMS
+    label : str
+        Label of the nodes
+    key_property : str
+        Property identifying the nodes
+    db : str
+        Name of the database
+    owner : str
+        Optional property only the nodes written by the syncing loader carry, e.g. the
+        hash property of utils/row_hash.py, nodes without it are never deleted
+
+    Returns
+    -------
+    set
+        Keys of the nodes
+    """
+    owned = f"AND n.`{owner}` IS NOT NULL" if owner else ""
+    query = f'''
+            MATCH (n:`{label}`)
+            WHERE n.`{key_property}` IS NOT NULL {owned}
+            RETURN n.`{key_property}`
+            '''
+    return {key for key, in conn.query_values(query, db=db)}
+
+#Key pairs of the start and end nodes of all relationships of a type between two labels
+def graph_pairs(conn, type, start, end, db):
+    (start_label, start_key), (end_label, end_key) = start, end
+    query = f'''
+            MATCH (a:`{start_label}`)-[:`{type}`]->(b:`{end_label}`)
+            WHERE a.`{start_key}` IS NOT NULL AND b.`{end_key}` IS NOT NULL
+            RETURN a.`{start_key}`, b.`{end_key}`
+            '''
+    return {(a, b) for a, b in conn.query_values(query, db=db)}
+
+#Split the keys of a source snapshot and of the graph into creates, updates and deletes
+def diff_keys(source, graph):
+    return source - graph, source & graph, graph - source
+
+#Refuse deletes that look like the result of an empty or truncated source snapshot
+def check_deletes(name, source, graph, delete, max_share):
+    if delete and not source:
+        raise ValueError(f"{name}: source snapshot is empty, refusing to delete {len(delete)} of {len(graph)}")
+    if max_share is not None and len(delete) > max_share * len(graph):
+        raise ValueError(f"{name}: sync would delete {len(delete)} of {len(graph)}, "
+                         f"more than the allowed share of {max_share}")
+
+#Delete the nodes of a label that are no longer in the source snapshot
+def sync_nodes(conn, label, key_property, source_keys, db, owner=None,
+               max_share=MAX_DELETE_SHARE, dry_run=False):
+    """Compares the keys of a complete source snapshot with the nodes of a label and
+    deletes the nodes missing in the source with all their relationships. Creates and
+    updates are written by the loader itself, together with utils/row_hash.py only
+    for new and changed rows
+
+    Parameters
+    ----------
+    conn : Neo4jConnection
+        Connection to the DBMS
+    label : str
+        Label of the nodes
+    key_property : str
+        Property identifying the nodes
+    source_keys : iterable
+        Keys of all rows of the source snapshot
+    db : str
+        Name of the database
+    owner : str
+        Optional property restricting the sync to the nodes written by the loader
+    max_share : float
+        Largest share of the nodes that may be deleted, None disables the check
+    dry_run : bool
+        Defines if the difference is only reported
+
+    Returns
+    -------
+    dict
+        Keys to create, update and delete
+    """
+    source = {key for key in source_keys if key is not None}
+    graph = graph_keys(conn, label, key_property, db, owner)
+    create, update, delete = diff_keys(source, graph)
+    print(f"{label}: {len(create)} to create, {len(update)} to update, {len(delete)} to delete")
+    check_deletes(label, source, graph, delete, max_share)
+    if delete and not dry_run:
+        owned = f"WHERE n.`{owner}` IS NOT NULL" if owner else ""
+        query = f'''
+                UNWIND $rows AS row
+                MATCH (n:`{label}` {{`{key_property}`: row.key}})
+                {owned}
+                DETACH DELETE n
+                RETURN count(*) as total
+                '''
+        conn.write_batches(query, [{'key': key} for key in delete], db=db)
+    return {'create': create, 'update': update, 'delete': delete}
+
+#Delete the relationships of a type that are no longer in the source snapshot
+def sync_relationships(conn, type, start, end, source_pairs, db,
+                       max_share=MAX_DELETE_SHARE, dry_run=False):
+    """Compares the key pairs of a complete source snapshot with the relationships of
+    a type between two labels and deletes the relationships missing in the source,
+    their start and end nodes are kept
+
+    Parameters
+    ----------
+    conn : Neo4jConnection
+        Connection to the DBMS
+    type : str
+        Type of the relationships
+    start : tuple
+        Label and key property of the start nodes, e.g. ('Person', 'Personennummer')
+    end : tuple
+        Label and key property of the end nodes
+    source_pairs : iterable
+        Start and end keys of all rows of the source snapshot
+    db : str
+        Name of the database
+    max_share : float
+        Largest share of the relationships that may be deleted, None disables the check
+    dry_run : bool
+        Defines if the difference is only reported
+
+    Returns
+    -------
+    dict
+        Key pairs to create, keep and delete
+    """
+    (start_label, start_key), (end_label, end_key) = start, end
+    name = f"{start_label}-{type}->{end_label}"
+    source = {(a, b) for a, b in source_pairs if a is not None and b is not None}
+    graph = graph_pairs(conn, type, start, end, db)
+    create, update, delete = diff_keys(source, graph)
+    print(f"{name}: {len(create)} to create, {len(update)} to keep, {len(delete)} to delete")
+    check_deletes(name, source, graph, delete, max_share)
+    if delete and not dry_run:
+        query = f'''
+                UNWIND $rows AS row
+                MATCH (a:`{start_label}` {{`{start_key}`: row.start}})
+                WITH row, a
+                MATCH (a)-[r:`{type}`]->(b:`{end_label}` {{`{end_key}`: row.end}})
+                DELETE r
+                RETURN count(*) as total
+                '''
+        conn.write_batches(query, [{'start': a, 'end': b} for a, b in delete], db=db)
+    return {'create': create, 'update': update, 'delete': delete}
+
+#Keys of a dataframe column as a set of native values, pandas missing values excluded
+def column_keys(df, column):
+    return set(df[column].dropna().tolist())
+
+#Key pairs of two dataframe columns, rows with a missing key excluded
+def column_pairs(df, start, end):
+    return set(df[[start, end]].dropna().itertuples(index=False, name=None))
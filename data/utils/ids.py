@@ -0,0 +1,92 @@
+import os
+import pandas as pd
+
+#Local file persisting the Personennummer of every Lobbywatch parliamentarian
+CROSSWALK_FILE = os.getenv('SPP_CROSSWALK_FILE', '.spp_crosswalk.parquet')
+
+#Canonical type of all node keys shared between the sources
+ID_DTYPE = 'Int64'
+
+#Convert key columns to integers and drop rows without a valid key
+def normalize_ids(df, columns):
+    """Converts the given columns to nullable integers, e.g. 123, '123' and 123.0 all
+    become 123, and drops the rows in which one of them is missing or not integral, as
+    a lookup with such a key could not match
+
+    Parameters
+    ----------
+    df : Pandas dataframe
+        Rows to normalize
+    columns : list
+        Key columns
+
+    Returns
+    -------
+    Pandas dataframe
+        Copy of the rows with valid keys
+    """
+    df = df.copy()
+    for column in columns:
+        values = pd.to_numeric(df[column], errors='coerce')
+        df[column] = values.where(values % 1 == 0).astype(ID_DTYPE)
+    invalid = df[columns].isna().any(axis=1)
+    if invalid.any():
+        print("Rows without valid", ", ".join(columns), "dropped:", int(invalid.sum()))
+    return df[~invalid]
+
+#Read the Personennummer of the Lobbywatch parliamentarians and persist the crosswalk
+def build_crosswalk(conn, db_read):
+    """Reads the parliament ID of every parliamentarian of the Lobbywatch database and
+    stores the mapping in CROSSWALK_FILE
+
+    Parameters
+    ----------
+    conn : Neo4jConnection
+        Connection to the DBMS
+    db_read : str
+        Name of the Lobbywatch database
+
+    Returns
+    -------
+    Pandas dataframe
+        Columns lobbywatch_id and Personennummer
+    """
+    query = '''
+            MATCH (p:Parlamentarier)
+            RETURN p.id, p.parlament_biografie_id
+            '''
+    result = conn.query_values(query, db=db_read, full_scan=True)
+    df = normalize_ids(pd.DataFrame(result, columns=["lobbywatch_id", "Personennummer"]),
+                       ["lobbywatch_id", "Personennummer"])
+    df.to_parquet(CROSSWALK_FILE, index=False)
+    return df
+
+#Read the persisted crosswalk or build it if it does not exist
+def load_crosswalk(conn, db_read, refresh=False):
+    if not refresh and os.path.exists(CROSSWALK_FILE):
+        return pd.read_parquet(CROSSWALK_FILE)
+    return build_crosswalk(conn, db_read)
+
+#Replace the Lobbywatch IDs of parliamentarians in a column by their Personennummer
+def to_personennummer(df, column, crosswalk):
+    """Maps a column of Lobbywatch parliamentarian IDs to Personennummer, rows of
+    parliamentarians without Personennummer are dropped
+
+    Parameters
+    ----------
+    df : Pandas dataframe
+        Rows to map
+    column : str
+        Column with Lobbywatch IDs, replaced by the Personennummer
+    crosswalk : Pandas dataframe
+        Crosswalk as returned by load_crosswalk
+
+    Returns
+    -------
+    Pandas dataframe
+        Mapped rows
+    """
+    mapping = crosswalk.set_index("lobbywatch_id")["Personennummer"]
+    df = normalize_ids(df, [column])
+    df[column] = df[column].map(mapping)
+    return normalize_ids(df, [column])
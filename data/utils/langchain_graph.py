@@ -0,0 +1,38 @@
+from langchain_community.graphs import Neo4jGraph
+from .neo4j_python_connection import get_driver
+
+#Neo4jGraph on an existing driver, the constructor of Neo4jGraph opens and verifies a private driver
+class SharedNeo4jGraph(Neo4jGraph):
+    """LangChain graph running on the given driver, e.g. the shared driver of
+    utils/neo4j_python_connection.py. Passed as graph to Neo4jVector, the vector store
+    uses its driver and database as well
+
+    Parameters
+    ----------
+    driver : neo4j.Driver
+        Driver to run the queries on
+    database : str
+        Name of the database
+    timeout : float
+        Optional timeout of a query in seconds
+    sanitize : bool
+        Defines if long lists should be removed from query results
+    refresh_schema : bool
+        Defines if the schema should be read when the graph is created
+    enhanced_schema : bool
+        Defines if example values should be added to the schema
+    """
+    def __init__(self, driver, database, timeout=None, sanitize=False, refresh_schema=True, enhanced_schema=False):
+        self._driver = driver
+        self._database = database
+        self.timeout = timeout
+        self.sanitize = sanitize
+        self._enhanced_schema = enhanced_schema
+        self.schema = ""
+        self.structured_schema = {}
+        if refresh_schema:
+            self.refresh_schema()
+
+#LangChain graph of a database on the process-wide driver for a URI and credentials
+def shared_graph(uri, user, pwd, database, **kwargs):
+    return SharedNeo4jGraph(get_driver(uri, user, pwd), database, **kwargs)
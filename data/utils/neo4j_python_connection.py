@@ -1,47 +1,561 @@
-from neo4j import GraphDatabase
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import re
+import threading
+import time
+from neo4j import AsyncGraphDatabase, GraphDatabase
+import pandas as pd
+from .query_profiler import attribute_to, calling_function, get_profiler
+from .schema import PLAN_CHECK, check_plan, plannable
+
+#Process-wide drivers keyed by URI and credentials
+_drivers = {}
+_drivers_lock = threading.Lock()
+
+#Get the shared driver for a DBMS, creating it on first use
+def get_driver(uri, user, pwd, **config):
+    """Returns the process-wide driver for the given URI and credentials
+
+    Parameters
+    ----------
+    uri : str
+        URI of the Neo4j DBMS
+    user : str
+        Name of the user
+    pwd : str
+        Password of the user
+    config :
+        Optional driver configuration, only applied when the driver is created
+
+    Returns
+    -------
+    neo4j.Driver
+        The shared driver
+    """
+    key = (uri, user, pwd)
+    with _drivers_lock:
+        if key not in _drivers:
+            _drivers[key] = GraphDatabase.driver(uri, auth=(user, pwd), **config)
+        return _drivers[key]
+
+#Close all shared drivers, registered to run at process exit
+def close_drivers():
+    with _drivers_lock:
+        for driver in _drivers.values():
+            driver.close()
+        _drivers.clear()
+
+atexit.register(close_drivers)
+
+#Summary counters reported for every written batch
+COUNTER_FIELDS = ('nodes_created', 'nodes_deleted', 'relationships_created', 'relationships_deleted',
+                  'properties_set', 'labels_added', 'labels_removed')
+
+#Split a dataframe or an iterable of dicts into lists of at most batch_size rows
+def iter_batches(rows, batch_size):
+    """Yields consecutive batches of rows without materializing the whole input
+
+    Parameters
+    ----------
+    rows : Pandas dataframe or iterable of dict
+        Rows to split into batches
+    batch_size : int
+        Maximum number of rows per batch
+
+    Returns
+    -------
+    generator
+        Lists of row dicts
+    """
+    if hasattr(rows, 'iloc'):
+        for start in range(0, len(rows), batch_size):
+            yield rows.iloc[start:start + batch_size].to_dict('records')
+        return
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+#Convert the counters of a result summary to a plain dict
+def counters_to_dict(counters):
+    return {field: getattr(counters, field) for field in COUNTER_FIELDS}
+
+#Split rows into shards so that all rows sharing a partition key value end up in the same shard
+def partition_rows(rows, partition_key, shards):
+    """Partitions rows by the hash of a key column
+
+    Parameters
+    ----------
+    rows : Pandas dataframe or iterable of dict
+        Rows to partition
+    partition_key : str
+        Column whose values must not be written by two shards at the same time
+    shards : int
+        Number of shards
+
+    Returns
+    -------
+    list
+        One dataframe or list of row dicts per non-empty shard
+    """
+    if hasattr(rows, 'iloc'):
+        shard_ids = rows[partition_key].map(lambda value: hash(value) % shards)
+        return [shard for _, shard in rows.groupby(shard_ids, sort=False)]
+    buckets = [[] for _ in range(shards)]
+    for row in rows:
+        buckets[hash(row[partition_key]) % shards].append(row)
+    return [bucket for bucket in buckets if bucket]
+
+#Alias of the rows unwound from $rows, e.g. 'row' in 'UNWIND $rows AS row'
+RE_ROWS_ALIAS = re.compile(r"UNWIND\s+\$rows\s+AS\s+(\w+)", re.IGNORECASE)
+
+#Columns of $rows a query reads
+def referenced_columns(query):
+    """Returns the columns a query reads as row.<column> or None if the query does not
+    unwind $rows or uses the whole row, e.g. in SET n += row
+
+    Parameters
+    ----------
+    query : str
+        Cypher query
+
+    Returns
+    -------
+    set or None
+        Names of the referenced columns
+    """
+    match = RE_ROWS_ALIAS.search(query)
+    if match is None:
+        return None
+    alias = re.escape(match.group(1))
+    if re.search(r"[=+,(\[]\s*%s\b(?!\.)" % alias, query):
+        return None
+    return set(re.findall(r"\b%s\.(\w+)" % alias, query))
+
+#Drop the columns a query does not read before the rows are sent
+def project_rows(query, rows):
+    columns = referenced_columns(query)
+    if columns is None:
+        return rows
+    if hasattr(rows, 'iloc'):
+        return rows[[column for column in rows.columns if column in columns]]
+    return ({key: value for key, value in row.items() if key in columns} for row in rows)
+
+#Unit of work for managed write transactions, retried by the driver on transient errors
+def _run_write(tx, query, parameters):
+    return tx.run(query, parameters).consume()
+
+async def _run_write_async(tx, query, parameters):
+    result = await tx.run(query, parameters)
+    return await result.consume()
 
 #build class for connecting to a Neo4j-Instance
 
 class Neo4jConnection:
     
-    def __init__(self, uri, user, pwd):
+    def __init__(self, uri, user, pwd, profiler=None, plan_check=PLAN_CHECK, **config):
         self.__uri = uri
         self.__user = user
         self.__pwd = pwd
+        self.__config = config
         self.__driver = None
-        try:
-            self.__driver = GraphDatabase.driver(self.__uri, auth=(self.__user, self.__pwd))
-        except Exception as e:
-            print("Failed to create the driver:", e)
+        self.__profiler = profiler if profiler is not None else get_profiler()
+        self.__plan_check = plan_check
+        self.__checked = set()
+
+    #The driver is shared per URI and credentials and only created when the first query runs
+    def driver(self):
+        if self.__driver is None:
+            try:
+                self.__driver = get_driver(self.__uri, self.__user, self.__pwd, **self.__config)
+            except Exception as e:
+                print("Failed to create the driver:", e)
+        return self.__driver
         
+    #Shared drivers stay open for other connections and are closed at process exit
     def close(self):
-        if self.__driver is not None:
-            self.__driver.close()
+        self.__driver = None
+
+    #Hand the execution of a query to the profiler if profiling is enabled
+    def __record(self, query, start, rows_sent, rows_returned, summary):
+        if self.__profiler is not None:
+            self.__profiler.record(query, time.perf_counter() - start, rows_sent, rows_returned,
+                                   counters_to_dict(summary.counters), summary.profile)
+
+    def __prepare(self, query):
+        return self.__profiler.prepare(query) if self.__profiler is not None else query
+
+    #Number of rows passed to a query as $rows
+    @staticmethod
+    def __rows_sent(parameters):
+        return len(parameters['rows']) if parameters and 'rows' in parameters else 0
+
+    #Plan a query without running it
+    def explain(self, query, parameters=None, db=None):
+        assert self.driver() is not None, "Driver not initialized!"
+        with self.__driver.session(database=db) if db is not None else self.__driver.session() as session:
+            return session.run("EXPLAIN " + query, parameters).consume().plan
+
+    #Fail before a statement first runs if its plan scans a label (see utils/schema.py), statements
+    #reading all nodes of a label on purpose are exempted with full_scan=True
+    def __check_plan(self, query, parameters, db, full_scan=False):
+        if self.__plan_check and not full_scan and plannable(query) and (query, db) not in self.__checked:
+            check_plan(query, self.explain(query, parameters, db))
+            self.__checked.add((query, db))
         
-    def query(self, query, parameters=None, db=None):
-        assert self.__driver is not None, "Driver not initialized!"
+    def query(self, query, parameters=None, db=None, full_scan=False):
+        assert self.driver() is not None, "Driver not initialized!"
+        self.__check_plan(query, parameters, db, full_scan)
         session = None
         response = None
         try: 
             session = self.__driver.session(database=db) if db is not None else self.__driver.session() 
-            response = list(session.run(query, parameters))
+            start = time.perf_counter()
+            result = session.run(self.__prepare(query), parameters)
+            response = list(result)
+            self.__record(query, start, self.__rows_sent(parameters), len(response), result.consume())
         except Exception as e:
             print("Query failed:", e)
+            raise
         finally: 
             if session is not None:
                 session.close()
         return response
 
-    def query_values(self, query, parameters=None, db=None):
-        assert self.__driver is not None, "Driver not initialized!"
+    def query_values(self, query, parameters=None, db=None, full_scan=False):
+        assert self.driver() is not None, "Driver not initialized!"
+        self.__check_plan(query, parameters, db, full_scan)
         session = None
         response = None
         try: 
             session = self.__driver.session(database=db) if db is not None else self.__driver.session() 
-            response = session.run(query, parameters).values()
+            start = time.perf_counter()
+            result = session.run(self.__prepare(query), parameters)
+            response = result.values()
+            self.__record(query, start, self.__rows_sent(parameters), len(response), result.consume())
         except Exception as e:
             print("Query failed:", e)
+            raise
         finally: 
             if session is not None:
                 session.close()
         return response
+
+    def stream(self, query, parameters=None, db=None, fetch_size=1000, full_scan=False):
+        """Yields the records of a query one by one instead of loading the whole result
+
+        Parameters
+        ----------
+        query : str
+            Cypher query
+        parameters : dict
+            Optional query parameters
+        db : str
+            Name of the database
+        fetch_size : int
+            Number of records the driver pulls from the server per round-trip, defaults to 1000
+        full_scan : bool
+            Defines if the query reads all nodes of a label on purpose and skips the plan check
+
+        Returns
+        -------
+        generator
+            Neo4j records
+        """
+        assert self.driver() is not None, "Driver not initialized!"
+        self.__check_plan(query, parameters, db, full_scan)
+        session = self.__driver.session(database=db, fetch_size=fetch_size) if db is not None \
+            else self.__driver.session(fetch_size=fetch_size)
+        with session:
+            start = time.perf_counter()
+            result = session.run(self.__prepare(query), parameters)
+            returned = 0
+            for record in result:
+                returned += 1
+                yield record
+            self.__record(query, start, self.__rows_sent(parameters), returned, result.consume())
+
+    def stream_frames(self, query, columns=None, chunk_rows=10000, parameters=None, db=None, fetch_size=1000,
+                      full_scan=False):
+        """Yields the result of a query as Pandas dataframes of at most chunk_rows rows
+
+        Parameters
+        ----------
+        query : str
+            Cypher query
+        columns : list
+            Optional column names, defaults to the keys returned by the query
+        chunk_rows : int
+            Maximum number of rows per dataframe, defaults to 10000
+        parameters : dict
+            Optional query parameters
+        db : str
+            Name of the database
+        fetch_size : int
+            Number of records the driver pulls from the server per round-trip, defaults to 1000
+        full_scan : bool
+            Defines if the query reads all nodes of a label on purpose and skips the plan check
+
+        Returns
+        -------
+        generator
+            Pandas dataframes
+        """
+        chunk = []
+        keys = columns
+        for record in self.stream(query, parameters, db, fetch_size, full_scan):
+            keys = keys or record.keys()
+            chunk.append(record.values())
+            if len(chunk) == chunk_rows:
+                yield pd.DataFrame(chunk, columns=keys)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=keys)
+
+    def write_batches(self, query, rows, batch_size=5000, parameters=None, db=None, verbose=False):
+        """Runs an UNWIND query once per batch of rows, each batch in its own managed
+        transaction that the driver retries on transient errors such as deadlocks
+
+        Parameters
+        ----------
+        query : str
+            Cypher query reading the current batch from $rows
+        rows : Pandas dataframe or iterable of dict
+            Rows to write, generators are consumed lazily, only the columns the query
+            references are sent
+        batch_size : int
+            Number of rows per transaction, defaults to 5000
+        parameters : dict
+            Optional additional query parameters
+        db : str
+            Name of the database
+        verbose : bool
+            Defines if the counters of every batch should be printed
+
+        Returns
+        -------
+        list
+            Counters of every batch as dicts including the number of rows sent
+        """
+        assert self.driver() is not None, "Driver not initialized!"
+        self.__check_plan(query, dict(parameters or {}, rows=[]), db)
+        report = []
+        session = self.__driver.session(database=db) if db is not None else self.__driver.session()
+        try:
+            for number, batch in enumerate(iter_batches(project_rows(query, rows), batch_size)):
+                start = time.perf_counter()
+                summary = session.execute_write(_run_write, self.__prepare(query), dict(parameters or {}, rows=batch))
+                self.__record(query, start, len(batch), 0, summary)
+                counters = dict(counters_to_dict(summary.counters), batch=number, rows=len(batch))
+                report.append(counters)
+                if verbose:
+                    print("Batch written:", counters)
+        finally:
+            session.close()
+        return report
+
+    def write_parallel(self, query, rows, partition_key, workers=4, batch_size=5000, parameters=None, db=None,
+                       verbose=False):
+        """Writes rows with several threads, each owning the rows of one partition of partition_key
+
+        Parameters
+        ----------
+        query : str
+            Cypher query reading the current batch from $rows
+        rows : Pandas dataframe or iterable of dict
+            Rows to write
+        partition_key : str
+            Column identifying the node the rows lock, e.g. 'PersonNumber', so that
+            concurrent transactions do not contend for the same nodes
+        workers : int
+            Number of threads and shards, defaults to 4
+        batch_size : int
+            Number of rows per transaction, defaults to 5000
+        parameters : dict
+            Optional additional query parameters
+        db : str
+            Name of the database
+        verbose : bool
+            Defines if the counters of every batch should be printed
+
+        Returns
+        -------
+        list
+            Counters of every batch as dicts including the shard and number of rows sent
+        """
+        shards = partition_rows(rows, partition_key, workers)
+        caller = calling_function() if self.__profiler is not None else None
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.__write_shard, caller, query, shard, batch_size, parameters, db, verbose)
+                       for shard in shards]
+            reports = [future.result() for future in futures]
+        return [dict(counters, shard=number) for number, report in enumerate(reports) for counters in report]
+
+    def write_grouped(self, queries, rows, group_key, batch_size=5000, parameters=None, db=None, verbose=False):
+        """Splits rows by the value of a column and writes every group only with the query
+        registered for its value, rows of other values are not sent
+
+        Parameters
+        ----------
+        queries : dict
+            Cypher query reading the current batch from $rows per value of group_key
+        rows : Pandas dataframe or iterable of dict
+            Rows to write
+        group_key : str
+            Column selecting the query, e.g. a relationship type or label
+        batch_size : int
+            Number of rows per transaction, defaults to 5000
+        parameters : dict
+            Optional additional query parameters
+        db : str
+            Name of the database
+        verbose : bool
+            Defines if the counters of every batch should be printed
+
+        Returns
+        -------
+        list
+            Counters of every batch as dicts including the group and number of rows sent
+        """
+        if hasattr(rows, 'iloc'):
+            groups = rows[rows[group_key].isin(list(queries))].groupby(group_key, sort=False)
+        else:
+            buckets = {}
+            for row in rows:
+                if row[group_key] in queries:
+                    buckets.setdefault(row[group_key], []).append(row)
+            groups = buckets.items()
+        return [dict(counters, group=value) for value, group in groups
+                for counters in self.write_batches(queries[value], group, batch_size, parameters, db, verbose)]
+
+    #Write one shard on a worker thread, attributing its queries to the function that started the parallel write
+    def __write_shard(self, caller, *args):
+        if caller is None:
+            return self.write_batches(*args)
+        with attribute_to(caller):
+            return self.write_batches(*args)
+
+#build class for connecting to a Neo4j-Instance with the async driver
+
+class AsyncNeo4jConnection:
+    
+    def __init__(self, uri, user, pwd, profiler=None, plan_check=PLAN_CHECK, **config):
+        self.__uri = uri
+        self.__user = user
+        self.__pwd = pwd
+        self.__config = config
+        self.__driver = None
+        self.__profiler = profiler if profiler is not None else get_profiler()
+        self.__plan_check = plan_check
+        self.__checked = set()
+
+    #Async drivers are bound to the event loop they are used on, so each connection owns its driver
+    def driver(self):
+        if self.__driver is None:
+            try:
+                self.__driver = AsyncGraphDatabase.driver(self.__uri, auth=(self.__user, self.__pwd), **self.__config)
+            except Exception as e:
+                print("Failed to create the driver:", e)
+        return self.__driver
+
+    async def close(self):
+        if self.__driver is not None:
+            await self.__driver.close()
+            self.__driver = None
+
+    def __record(self, query, start, rows_sent, rows_returned, summary):
+        if self.__profiler is not None:
+            self.__profiler.record(query, time.perf_counter() - start, rows_sent, rows_returned,
+                                   counters_to_dict(summary.counters), summary.profile)
+
+    def __prepare(self, query):
+        return self.__profiler.prepare(query) if self.__profiler is not None else query
+
+    @staticmethod
+    def __rows_sent(parameters):
+        return len(parameters['rows']) if parameters and 'rows' in parameters else 0
+
+    def __session(self, db):
+        return self.driver().session(database=db) if db is not None else self.driver().session()
+
+    async def explain(self, query, parameters=None, db=None):
+        assert self.driver() is not None, "Driver not initialized!"
+        async with self.__session(db) as session:
+            result = await session.run("EXPLAIN " + query, parameters)
+            return (await result.consume()).plan
+
+    async def __check_plan(self, query, parameters, db, full_scan=False):
+        if self.__plan_check and not full_scan and plannable(query) and (query, db) not in self.__checked:
+            check_plan(query, await self.explain(query, parameters, db))
+            self.__checked.add((query, db))
+
+    async def query(self, query, parameters=None, db=None, full_scan=False):
+        assert self.driver() is not None, "Driver not initialized!"
+        await self.__check_plan(query, parameters, db, full_scan)
+        try:
+            async with self.__session(db) as session:
+                start = time.perf_counter()
+                result = await session.run(self.__prepare(query), parameters)
+                response = [record async for record in result]
+                self.__record(query, start, self.__rows_sent(parameters), len(response), await result.consume())
+        except Exception as e:
+            print("Query failed:", e)
+            raise
+        return response
+
+    async def query_values(self, query, parameters=None, db=None, full_scan=False):
+        assert self.driver() is not None, "Driver not initialized!"
+        await self.__check_plan(query, parameters, db, full_scan)
+        try:
+            async with self.__session(db) as session:
+                start = time.perf_counter()
+                result = await session.run(self.__prepare(query), parameters)
+                response = await result.values()
+                self.__record(query, start, self.__rows_sent(parameters), len(response), await result.consume())
+        except Exception as e:
+            print("Query failed:", e)
+            raise
+        return response
+
+    async def write_batches(self, query, rows, batch_size=5000, parameters=None, db=None, verbose=False):
+        """Runs an UNWIND query once per batch of rows, each batch in its own managed
+        transaction that the driver retries on transient errors such as deadlocks
+
+        Parameters
+        ----------
+        query : str
+            Cypher query reading the current batch from $rows
+        rows : Pandas dataframe or iterable of dict
+            Rows to write, generators are consumed lazily, only the columns the query
+            references are sent
+        batch_size : int
+            Number of rows per transaction, defaults to 5000
+        parameters : dict
+            Optional additional query parameters
+        db : str
+            Name of the database
+        verbose : bool
+            Defines if the counters of every batch should be printed
+
+        Returns
+        -------
+        list
+            Counters of every batch as dicts including the number of rows sent
+        """
+        assert self.driver() is not None, "Driver not initialized!"
+        await self.__check_plan(query, dict(parameters or {}, rows=[]), db)
+        report = []
+        async with self.__session(db) as session:
+            for number, batch in enumerate(iter_batches(project_rows(query, rows), batch_size)):
+                start = time.perf_counter()
+                summary = await session.execute_write(_run_write_async, self.__prepare(query),
+                                                      dict(parameters or {}, rows=batch))
+                self.__record(query, start, len(batch), 0, summary)
+                counters = dict(counters_to_dict(summary.counters), batch=number, rows=len(batch))
+                report.append(counters)
+                if verbose:
+                    print("Batch written:", counters)
+        return report
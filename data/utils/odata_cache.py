@@ -0,0 +1,104 @@
+import glob
+import hashlib
+import json
+import os
+import time
+import pandas as pd
+
+#Directory of the cached tables, defaults to .spp_cache in the working directory
+CACHE_DIR = os.getenv('SPP_CACHE_DIR', '.spp_cache')
+
+#Seconds after which a cached table is downloaded again, defaults to 12 hours
+DEFAULT_TTL = float(os.getenv('SPP_CACHE_TTL', 12 * 3600))
+
+#Path of the Parquet file caching a table for a language and filter arguments
+def cache_path(table, language, filters):
+    """Returns the cache file of a table, keyed by table, language and filter arguments
+
+    Parameters
+    ----------
+    table : str
+        Name of the table
+    language : str
+        Language of the table
+    filters : dict
+        Filter arguments passed to swissparlpy
+
+    Returns
+    -------
+    str
+        Path of the Parquet file
+    """
+    key = json.dumps({'table': table, 'language': language, 'filters': filters}, sort_keys=True, default=str)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{table}_{language}_{digest}.parquet")
+
+#Read a cached table if it exists and is younger than ttl seconds
+def read_cached(table, language, filters, ttl=DEFAULT_TTL):
+    path = cache_path(table, language, filters)
+    if not os.path.exists(path) or time.time() - os.path.getmtime(path) > ttl:
+        return None
+    return pd.read_parquet(path)
+
+#Store a table in the cache, a failing write only disables caching for this table
+def write_cached(df, table, language, filters):
+    path = cache_path(table, language, filters)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    try:
+        df.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+    except Exception as e:
+        print("Caching table failed:", table, e)
+
+#Remove cached tables
+def invalidate(table=None):
+    """Deletes the cache files of a table or, if no table is given, of all tables
+
+    Parameters
+    ----------
+    table : str
+        Optional name of the table
+
+    Returns
+    -------
+    int
+        Number of deleted files
+    """
+    paths = glob.glob(os.path.join(CACHE_DIR, f"{table}_*.parquet" if table else "*.parquet"))
+    for path in paths:
+        os.remove(path)
+    return len(paths)
+
+#Return a table from the cache or fetch and cache it
+def cached_table(fetch, table, language, ttl=DEFAULT_TTL, refresh=False, **filters):
+    """Returns the cached table or calls fetch and caches its result
+
+    Parameters
+    ----------
+    fetch : callable
+        Function returning the table as Pandas dataframe, called with table, language and filters
+    table : str
+        Name of the table
+    language : str
+        Language of the table
+    ttl : float
+        Maximum age of the cached table in seconds, 0 disables the cache
+    refresh : bool
+        Defines if the table should be fetched even if a valid cache file exists
+    filters :
+        Filter arguments passed to fetch
+
+    Returns
+    -------
+    Pandas dataframe
+        The table
+    """
+    if ttl <= 0:
+        return fetch(table, language, **filters)
+    if not refresh:
+        df = read_cached(table, language, filters, ttl)
+        if df is not None:
+            return df
+    df = fetch(table, language, **filters)
+    write_cached(df, table, language, filters)
+    return df
@@ -0,0 +1,176 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import queue
+import threading
+import time
+import pandas as pd
+import pyodata
+import requests
+
+#OData service of the Swiss Parliament Webservices
+SERVICE_URL = 'https://ws.parlament.ch/odata.svc/'
+
+#pyodata client shared by all projected fetches, its metadata is only loaded once
+_client = None
+_client_lock = threading.Lock()
+
+def odata_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = pyodata.Client(SERVICE_URL, requests.Session())
+        return _client
+
+#Yield the rows of a table with only the requested columns
+def select_rows(table, columns, **filters):
+    """Yields the rows of a table restricted to the given columns with OData $select,
+    following the server-side paging
+
+    Parameters
+    ----------
+    table : str
+        Name of the table
+    columns : list
+        Columns to fetch
+    filters :
+        Arguments for filtering the returned data, e.g. Language='DE' or ID__in=[...]
+
+    Returns
+    -------
+    generator
+        Rows as dicts
+    """
+    entity_set = getattr(odata_client().entity_sets, table)
+    request = entity_set.get_entities().select(','.join(columns))
+    if filters:
+        request = request.filter(**filters)
+    entities = request.execute()
+    while True:
+        for entity in entities:
+            yield {column: getattr(entity, column) for column in columns}
+        if entities.next_url is None:
+            return
+        entities = entity_set.get_entities().next_url(entities.next_url).execute()
+
+#Spaces the start of requests so that at most per_second requests are started per second
+class RateLimiter:
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self.__next_start = 0.0
+        self.__lock = threading.Lock()
+
+    def wait(self):
+        with self.__lock:
+            now = time.monotonic()
+            start = max(now, self.__next_start)
+            self.__next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+#Fetch the rows of a table matching a list of IDs with multi-value filters on a bounded worker pool
+def fetch_in_chunks(fetch, table, column, ids, language='DE', chunk_size=50, workers=4, per_second=8, **kwargs):
+    """Fetches the rows whose column matches one of the given IDs, grouping the IDs into
+    '<column>__in' filters of chunk_size values, and concatenates the results once
+
+    Parameters
+    ----------
+    fetch : callable
+        Function returning a table as Pandas dataframe, called with table, language and filters
+    table : str
+        Name of the table
+    column : str
+        Column to filter on, e.g. 'BusinessNumber'
+    ids : list
+        Values of column to fetch
+    language : str
+        Language of the table, defaults to 'DE'
+    chunk_size : int
+        Number of IDs per request, keeps the request URL short, defaults to 50
+    workers : int
+        Maximum number of concurrent requests, defaults to 4
+    per_second : float
+        Maximum number of requests started per second, defaults to 8
+    kwargs :
+        Optional additional arguments for filtering the returned data
+
+    Returns
+    -------
+    Pandas dataframe
+        Rows of all chunks in the order of the sorted IDs
+    """
+    ids = sorted(value for value in set(ids) if value is not None)
+    chunks = [ids[start:start + chunk_size] for start in range(0, len(ids), chunk_size)]
+    limiter = RateLimiter(per_second)
+
+    def fetch_chunk(chunk):
+        limiter.wait()
+        return fetch(table, language, **{column + '__in': chunk}, **kwargs)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        frames = list(executor.map(fetch_chunk, chunks))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+#Marks the end of the pages put into the queue by the producer
+_END = object()
+
+#Download pages of rows in a background thread while the caller processes earlier pages
+def prefetch_pages(open_rows, page_size=1000, queue_depth=4):
+    """Yields the rows of a lazily paged source as Pandas dataframes. A producer thread
+    iterates the source and puts pages into a bounded queue, so downloading the next
+    pages overlaps with processing the current one and at most queue_depth pages are
+    held in memory
+
+    Parameters
+    ----------
+    open_rows : callable
+        Function without arguments returning an iterable of rows, called in the producer thread
+    page_size : int
+        Number of rows per dataframe, defaults to 1000
+    queue_depth : int
+        Maximum number of downloaded pages waiting to be processed, defaults to 4
+
+    Returns
+    -------
+    generator
+        Pandas dataframes
+    """
+    pages = queue.Queue(maxsize=queue_depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            rows = iter(open_rows())
+            while True:
+                page = list(islice(rows, page_size))
+                if not page or not put(pd.DataFrame(page)):
+                    break
+        except Exception as e:
+            put(e)
+        finally:
+            put(_END)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            page = pages.get()
+            if page is _END:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        stop.set()
+        producer.join()
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import time
+import pandas as pd
+
+#'record' stores every downloaded table as fixture, 'replay' serves the fixtures instead of the web service
+REPLAY_MODE = os.getenv('SPP_REPLAY', '')
+
+#Directory of the recorded fixtures, defaults to spp_fixtures in the working directory
+FIXTURE_DIR = os.getenv('SPP_FIXTURE_DIR', 'spp_fixtures')
+
+#Seconds waited before every replayed page, simulating the latency of the web service
+REPLAY_LATENCY = float(os.getenv('SPP_REPLAY_LATENCY', 0))
+
+#Rows per replayed page, the web service returns pages of 1000 rows
+REPLAY_PAGE_SIZE = int(os.getenv('SPP_REPLAY_PAGE_SIZE', 1000))
+
+#Path of the Parquet file holding the response of a table for a request
+def fixture_path(table, request):
+    """Returns the fixture file of a table, keyed by table and request arguments. The
+    values of '<column>__in' filters are sorted, so the key does not depend on their order
+
+    Parameters
+    ----------
+    table : str
+        Name of the table
+    request : dict
+        Language, columns and filter arguments of the request
+
+    Returns
+    -------
+    str
+        Path of the Parquet file
+    """
+    filters = {name: sorted(value) if name.endswith('__in') else value
+               for name, value in request.get('filters', {}).items()}
+    request = dict(request, filters=filters)
+    key = json.dumps({'table': table, 'request': request}, sort_keys=True, default=str)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(FIXTURE_DIR, f"{table}_{digest}.parquet")
+
+#Download all rows of a response and store them as fixture
+def record_rows(rows, table, request):
+    df = pd.DataFrame(list(rows))
+    path = fixture_path(table, request)
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    df.to_parquet(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+    return df.to_dict('records')
+
+#Serve the rows of a recorded response page by page
+def replay_rows(table, request, latency=REPLAY_LATENCY, page_size=REPLAY_PAGE_SIZE):
+    """Yields the rows of a recorded response, waiting latency seconds before every page
+
+    Parameters
+    ----------
+    table : str
+        Name of the table
+    request : dict
+        Language, columns and filter arguments of the request
+    latency : float
+        Seconds waited before every page, defaults to SPP_REPLAY_LATENCY
+    page_size : int
+        Number of rows per page, defaults to SPP_REPLAY_PAGE_SIZE
+
+    Returns
+    -------
+    generator
+        Rows as dicts
+    """
+    path = fixture_path(table, request)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No fixture recorded for table {table} and request {request}: {path}")
+    rows = pd.read_parquet(path).to_dict('records')
+    for start in range(0, max(len(rows), 1), page_size):
+        if latency:
+            time.sleep(latency)
+        yield from rows[start:start + page_size]
+
+#Route a function opening the rows of a table through the recorder or the replay
+def replayable(open_rows):
+    """Wraps a function open_rows(table, language, columns, **filters) returning the rows
+    of a table. Depending on SPP_REPLAY the rows are passed through, recorded to or
+    replayed from the fixture directory
+
+    Parameters
+    ----------
+    open_rows : callable
+        Function returning an iterable of rows
+
+    Returns
+    -------
+    callable
+        Function with the same arguments
+    """
+    def wrapped(table, language = 'DE', columns = None, **filters):
+        request = {'language': language, 'columns': columns, 'filters': filters}
+        if REPLAY_MODE == 'replay':
+            return replay_rows(table, request)
+        rows = open_rows(table, language, columns, **filters)
+        if REPLAY_MODE == 'record':
+            return record_rows(rows, table, request)
+        return rows
+    return wrapped
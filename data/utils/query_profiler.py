@@ -0,0 +1,150 @@
+import atexit
+import csv
+import json
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+
+#Schema and introspection statements cannot be prefixed with PROFILE
+RE_NO_PROFILE = re.compile(r"^\s*((CREATE|DROP)\s+(\w+\s+)?(CONSTRAINT|INDEX)|SHOW|PROFILE|EXPLAIN)\b", re.IGNORECASE)
+
+#Source files whose frames are skipped when attributing a query to the calling function
+INTERNAL_FILES = {os.path.abspath(__file__), os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                                          'neo4j_python_connection.py'))}
+
+#Thread-local attribution for queries run on worker threads
+_local = threading.local()
+
+#Process-wide profiler shared by all connections
+_profiler = None
+_profiler_lock = threading.Lock()
+
+#Name of the first function outside the connection code on the call stack
+def calling_function():
+    """Returns the calling function as 'module.function', e.g. 'parlament_class.voting'"""
+    caller = getattr(_local, 'caller', None)
+    if caller is not None:
+        return caller
+    frame = sys._getframe(1)
+    while frame is not None and os.path.abspath(frame.f_code.co_filename) in INTERNAL_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return 'unknown'
+    module = frame.f_globals.get('__name__', 'unknown')
+    if module == '__main__':
+        module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+    return f"{module}.{frame.f_code.co_name}"
+
+#Attribute all queries of the current thread to the given caller
+@contextmanager
+def attribute_to(caller):
+    previous = getattr(_local, 'caller', None)
+    _local.caller = caller
+    try:
+        yield
+    finally:
+        _local.caller = previous
+
+#Sum the database hits of a PROFILE plan including all child operators
+def sum_db_hits(plan):
+    if not plan:
+        return 0
+    return plan.get('dbHits', 0) + sum(sum_db_hits(child) for child in plan.get('children', []))
+
+#Collects timings and counters per calling function and statement
+class QueryProfiler:
+
+    def __init__(self, report_path, db_hits=False):
+        self.report_path = report_path
+        self.db_hits = db_hits
+        self.__stats = {}
+        self.__lock = threading.Lock()
+        atexit.register(self.dump)
+
+    def prepare(self, query):
+        """Returns the query to run, prefixed with PROFILE if database hits are collected"""
+        if self.db_hits and not RE_NO_PROFILE.match(query):
+            return "PROFILE " + query
+        return query
+
+    def record(self, query, seconds, rows_sent, rows_returned, counters, plan=None):
+        """Adds one query execution to the statistics of its calling function
+
+        Parameters
+        ----------
+        query : str
+            The executed Cypher query without PROFILE prefix
+        seconds : float
+            Wall time of the execution
+        rows_sent : int
+            Number of rows passed as $rows
+        rows_returned : int
+            Number of records returned
+        counters : dict
+            Summary counters of the execution
+        plan : dict
+            Optional PROFILE plan of the execution
+        """
+        caller = calling_function()
+        statement = ' '.join(query.split())
+        with self.__lock:
+            entry = self.__stats.setdefault((caller, statement), dict(
+                {'function': caller, 'statement': statement, 'calls': 0, 'seconds': 0.0,
+                 'rows_sent': 0, 'rows_returned': 0, 'db_hits': 0},
+                **{field: 0 for field in counters}))
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['rows_sent'] += rows_sent
+            entry['rows_returned'] += rows_returned
+            entry['db_hits'] += sum_db_hits(plan)
+            for field, value in counters.items():
+                entry[field] = entry.get(field, 0) + value
+
+    def statements(self):
+        """Returns the statistics per calling function and statement, slowest first"""
+        with self.__lock:
+            return sorted((dict(entry) for entry in self.__stats.values()),
+                          key=lambda entry: entry['seconds'], reverse=True)
+
+    def functions(self):
+        """Returns the statistics summed per calling function, slowest first"""
+        totals = {}
+        for entry in self.statements():
+            total = totals.setdefault(entry['function'], {'function': entry['function'], 'statements': 0})
+            total['statements'] += 1
+            for field, value in entry.items():
+                if field not in ('function', 'statement'):
+                    total[field] = total.get(field, 0) + value
+        return sorted(totals.values(), key=lambda total: total['seconds'], reverse=True)
+
+    def dump(self):
+        """Writes the report as CSV if report_path ends with .csv, as JSON otherwise"""
+        statements = self.statements()
+        if not statements:
+            return
+        if self.report_path.endswith('.csv'):
+            fields = list(dict.fromkeys(field for entry in statements for field in entry))
+            with open(self.report_path, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(statements)
+        else:
+            with open(self.report_path, 'w', encoding='utf-8') as file:
+                json.dump({'functions': self.functions(), 'statements': statements},
+                          file, indent=2, ensure_ascii=False)
+        print("Query profile written to", self.report_path)
+
+#Get the process-wide profiler configured by NEO4J_PROFILE_REPORT and NEO4J_PROFILE_DB_HITS
+def get_profiler():
+    """Returns the shared profiler or None if NEO4J_PROFILE_REPORT is not set"""
+    global _profiler
+    report_path = os.getenv('NEO4J_PROFILE_REPORT')
+    if not report_path:
+        return None
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = QueryProfiler(report_path,
+                                      db_hits=os.getenv('NEO4J_PROFILE_DB_HITS', '').lower() in ('1', 'true'))
+        return _profiler
@@ -0,0 +1,61 @@
+import pandas as pd
+
+#Hash over the given columns of every row, stable across runs and processes
+def row_hashes(df, columns):
+    return pd.util.hash_pandas_object(df[columns], index=False).map('{:016x}'.format)
+
+#Keep only the rows whose hash differs from the hash stored on their node
+def changed_rows(conn, df, label, key, columns, hash_property, db, force=False):
+    """Hashes the given columns of every row and drops the rows whose node already
+    stores the same hash, so unchanged rows are neither sent nor written. With force
+    all rows are kept, still with their hash, so store_hashes stays correct
+
+    Parameters
+    ----------
+    conn : Neo4jConnection
+        Connection to the DBMS
+    df : Pandas dataframe
+        Rows of the loaded table, one row per node
+    label : str
+        Label of the nodes
+    key : tuple
+        Key property and the column holding its values, e.g. ('Personennummer', 'ID')
+    columns : list
+        Columns the loader writes
+    hash_property : str
+        Property storing the hash of the loader, e.g. 'Hash_MemberCouncil'
+    db : str
+        Name of the database
+    force : bool
+        Defines if unchanged rows are kept as well, without reading the stored hashes
+
+    Returns
+    -------
+    Pandas dataframe
+        New and changed rows with their hash in the column row_hash
+    """
+    key_property, key_column = key
+    df = df.assign(row_hash=row_hashes(df, columns))
+    if force:
+        return df
+    query = f'''
+            UNWIND $keys AS key
+            MATCH (n:`{label}` {{`{key_property}`: key}})
+            RETURN key, n.`{hash_property}`
+            '''
+    keys = df[key_column].dropna().unique().tolist()
+    stored = dict(conn.query_values(query, parameters={'keys': keys}, db=db))
+    unchanged = df[key_column].map(stored) == df['row_hash']
+    print(f"{label}: {int(unchanged.sum())} of {len(df)} rows unchanged")
+    return df[~unchanged]
+
+#Store the hashes of written rows on their nodes, only after all statements of the loader succeeded
+def store_hashes(conn, df, label, key, hash_property, db):
+    key_property, key_column = key
+    query = f'''
+            UNWIND $rows AS row
+            MATCH (n:`{label}` {{`{key_property}`: row.{key_column}}})
+            SET n.`{hash_property}` = row.row_hash
+            RETURN count(n) as total
+            '''
+    return conn.write_batches(query, df, db=db)
@@ -0,0 +1,145 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import time
+
+#One step of an import, declaring the node labels it reads and writes
+class Stage:
+
+    def __init__(self, name, run, requires=(), produces=()):
+        """
+        Parameters
+        ----------
+        name : str
+            Name of the stage used in the timing summary
+        run : callable
+            Function without arguments running the stage
+        requires : iterable
+            Node labels that must be completely loaded before the stage starts
+        produces : iterable
+            Node labels the stage creates or merges
+        """
+        self.name = name
+        self.run = run
+        self.requires = set(requires)
+        self.produces = set(produces)
+
+#Derive the stages every stage has to wait for from the declared labels
+def stage_dependencies(stages, available=()):
+    """Returns the names of the stages each stage depends on. A stage depends on every
+    other stage producing one of its required labels
+
+    Parameters
+    ----------
+    stages : list
+        List of stages
+    available : iterable
+        Labels that are already loaded and need no producing stage
+
+    Returns
+    -------
+    dict
+        Set of stage names per stage name
+    """
+    producers = {}
+    for stage in stages:
+        for label in stage.produces:
+            producers.setdefault(label, set()).add(stage.name)
+    dependencies = {}
+    for stage in stages:
+        missing = stage.requires - set(producers) - set(available)
+        if missing:
+            raise ValueError(f"Stage {stage.name} requires labels no stage produces: {sorted(missing)}")
+        dependencies[stage.name] = {name for label in stage.requires
+                                    for name in producers.get(label, ()) if name != stage.name}
+    # Detect cycles by repeatedly removing stages without open dependencies
+    open_dependencies = {name: set(deps) for name, deps in dependencies.items()}
+    while open_dependencies:
+        ready = [name for name, deps in open_dependencies.items() if not deps]
+        if not ready:
+            raise ValueError(f"Cyclic stage dependencies between {sorted(open_dependencies)}")
+        for name in ready:
+            del open_dependencies[name]
+        for deps in open_dependencies.values():
+            deps.difference_update(ready)
+    return dependencies
+
+#Run the stages concurrently as soon as all their dependencies are finished
+def run_stages(stages, workers=4, available=()):
+    """Runs stages on a thread pool in dependency order and prints a timing summary with
+    the critical path. If a stage fails, its dependent stages are skipped and the first
+    error is raised after all running stages finished
+
+    Parameters
+    ----------
+    stages : list
+        List of stages
+    workers : int
+        Maximum number of concurrently running stages, defaults to 4
+    available : iterable
+        Labels that are already loaded and need no producing stage
+
+    Returns
+    -------
+    dict
+        Result of every finished stage per stage name
+    """
+    dependencies = stage_dependencies(stages, available)
+    by_name = {stage.name: stage for stage in stages}
+    pending = set(by_name)
+    results, timings, errors = {}, {}, {}
+    origin = time.perf_counter()
+
+    def timed(stage):
+        start = time.perf_counter()
+        try:
+            return stage.run()
+        finally:
+            timings[stage.name] = (start - origin, time.perf_counter() - origin)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running = {}
+        while pending or running:
+            skipped = True
+            while skipped:
+                skipped = [name for name in sorted(pending) if dependencies[name] & set(errors)]
+                for name in skipped:
+                    pending.discard(name)
+                    errors[name] = None
+                    print("Stage skipped:", name)
+            for name in sorted(pending):
+                if dependencies[name] <= set(results):
+                    pending.discard(name)
+                    running[executor.submit(timed, by_name[name])] = name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print("Stage failed:", name, e)
+                    errors[name] = e
+
+    print_timing_summary(dependencies, timings, time.perf_counter() - origin)
+    first_error = next((error for error in errors.values() if error is not None), None)
+    if first_error is not None:
+        raise first_error
+    return results
+
+#Print start, duration and critical path of the finished stages
+def print_timing_summary(dependencies, timings, wall_time):
+    finished = sorted(timings, key=lambda name: timings[name][0])
+    # Longest chain of durations ending in each stage
+    chain = {}
+    for name in sorted(finished, key=lambda name: timings[name][1]):
+        duration = timings[name][1] - timings[name][0]
+        before = max((chain[dep] for dep in dependencies[name] if dep in chain),
+                     key=lambda item: item[0], default=(0.0, []))
+        chain[name] = (before[0] + duration, before[1] + [name])
+    print(f"{'Stage':<28}{'Start [s]':>12}{'Duration [s]':>14}")
+    for name in finished:
+        start, end = timings[name]
+        print(f"{name:<28}{start:>12.1f}{end - start:>14.1f}")
+    if chain:
+        length, path = max(chain.values(), key=lambda item: item[0])
+        print(f"Critical path ({length:.1f} s of {wall_time:.1f} s wall time): " + " -> ".join(path))
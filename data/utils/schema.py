@@ -0,0 +1,118 @@
+import os
+from .query_profiler import RE_NO_PROFILE
+
+#Properties identifying the nodes of a label, created as uniqueness constraints
+UNIQUE_KEYS = {
+    'Person': ['Personennummer', 'ID'],
+    'Partei': ['Parteinummer'],
+    'Rat': ['Ratnummer'],
+    'Kanton': ['Kantonsnummer'],
+    'Fraktion': ['Fraktionsnummer'],
+    'Kommission': ['Kommissionsnummer'],
+    'Abstimmung': ['Abstimmungsnummer'],
+    'Geschäft': ['Geschäftsnummer'],
+    'Session': ['Sessionsnummer'],
+    'Gesetz': ['Gesetzesnummer'],
+    'Thema': ['Name'],
+    'Departement': ['Departementsnummer'],
+    'Organisation': ['ID'],
+    'Interessenraum': ['ID'],
+    'Interessengruppe': ['ID'],
+    'Branche': ['ID'],
+    'Text': ['Text_ID'],
+    'Chunk': ['Chunk_ID'],
+}
+
+#Properties looked up without being unique, created as range indexes. Several text chunks
+#share the ID of their owner, parliamentarians are looked up by the key of Person
+LOOKUP_KEYS = {
+    'Text': ['ID'],
+    'Parlamentarier': ['Personennummer'],
+}
+
+#Plan operators showing that a statement scans a label instead of seeking an index
+FORBIDDEN_OPERATORS = ('NodeByLabelScan', 'CartesianProduct')
+
+#EXPLAIN every statement once before it runs if NEO4J_PLAN_CHECK is set
+PLAN_CHECK = os.getenv('NEO4J_PLAN_CHECK', '').lower() in ('1', 'true')
+
+#Schema and introspection statements have no plan to check
+def plannable(query):
+    return not RE_NO_PROFILE.match(query)
+
+#Statements creating the declared constraints and indexes
+def schema_statements(labels=None):
+    """Returns idempotent statements creating a uniqueness constraint per key and a range
+    index per lookup key of the declared labels
+
+    Parameters
+    ----------
+    labels : iterable
+        Optional labels to restrict the statements to, defaults to all declared labels
+
+    Returns
+    -------
+    list
+        Cypher statements
+    """
+    statements = []
+    for label, keys in UNIQUE_KEYS.items():
+        if labels is None or label in labels:
+            statements += [f"CREATE CONSTRAINT `{label}_{key}` IF NOT EXISTS "
+                           f"FOR (n:`{label}`) REQUIRE n.`{key}` IS UNIQUE" for key in keys]
+    for label, keys in LOOKUP_KEYS.items():
+        if labels is None or label in labels:
+            statements += [f"CREATE INDEX `{label}_{key}` IF NOT EXISTS "
+                           f"FOR (n:`{label}`) ON (n.`{key}`)" for key in keys]
+    return statements
+
+#Create the declared constraints and indexes and wait until they are online
+def ensure_schema(conn, db, labels=None):
+    """Creates the missing constraints and indexes, existing ones are left unchanged
+
+    Parameters
+    ----------
+    conn : Neo4jConnection
+        Connection to the DBMS
+    db : str
+        Name of the database
+    labels : iterable
+        Optional labels to restrict the schema to, defaults to all declared labels
+    """
+    for statement in schema_statements(labels):
+        conn.query(statement, db=db)
+    conn.query("CALL db.awaitIndexes(300)", db=db)
+
+#Operator types of a plan and all its children
+def plan_operators(plan):
+    yield plan['operatorType'].split('@')[0]
+    for child in plan.get('children', []):
+        yield from plan_operators(child)
+
+#Forbidden operators of a plan, a cartesian product only if it joins the result of a scan. Two
+#lookups by key per row, e.g. MATCH (a {ID: row.a}) MATCH (b {ID: row.b}), join one node by one
+def forbidden_operators(plan, forbidden=FORBIDDEN_OPERATORS):
+    operator = plan['operatorType'].split('@')[0]
+    if operator in forbidden and (operator != 'CartesianProduct'
+                                  or any('Scan' in name for name in plan_operators(plan))):
+        yield operator
+    for child in plan.get('children', []):
+        yield from forbidden_operators(child, forbidden)
+
+#Fail if the plan of a statement scans a label or builds a cartesian product over a scan
+def check_plan(query, plan, forbidden=FORBIDDEN_OPERATORS):
+    """Raises a ValueError if the plan of a statement contains a forbidden operator
+
+    Parameters
+    ----------
+    query : str
+        Cypher statement, used in the error message
+    plan : dict
+        Plan of the statement as returned by EXPLAIN
+    forbidden : iterable
+        Operator types that are not allowed, defaults to FORBIDDEN_OPERATORS
+    """
+    found = sorted(set(forbidden_operators(plan, forbidden)))
+    if found:
+        raise ValueError(f"Plan uses {', '.join(found)}, declare the lookup keys in utils/schema.py "
+                         f"or pass full_scan=True if the statement reads all nodes of a label:\n{query}")
@@ -0,0 +1,99 @@
+from datetime import datetime
+import json
+import os
+import threading
+
+#Local file persisting the high-water mark of every incrementally loaded table
+STATE_FILE = os.getenv('SPP_STATE_FILE', '.spp_state.json')
+
+_state_lock = threading.Lock()
+
+def _read_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE, encoding='utf-8') as file:
+        return json.load(file)
+
+#Watermarks are stored as JSON, datetimes as ISO strings with a type marker
+def _encode(value):
+    if hasattr(value, 'isoformat'):
+        return {'datetime': value.isoformat()}
+    return value.item() if hasattr(value, 'item') else value
+
+def _decode(value):
+    if isinstance(value, dict) and 'datetime' in value:
+        return datetime.fromisoformat(value['datetime'])
+    return value
+
+#Read the high-water mark of a table in a database
+def get_watermark(db, table, column):
+    """Returns the stored high-water mark or None if the table was never loaded incrementally
+
+    Parameters
+    ----------
+    db : str
+        Name of the database the table is loaded into
+    table : str
+        Name of the table
+    column : str
+        Column the high-water mark refers to, e.g. 'Modified' or 'ID'
+
+    Returns
+    -------
+    datetime, int or None
+        The high-water mark
+    """
+    with _state_lock:
+        return _decode(_read_state().get(db, {}).get(table, {}).get(column))
+
+#Persist the high-water mark of a table in a database
+def set_watermark(db, table, column, value):
+    with _state_lock:
+        state = _read_state()
+        state.setdefault(db, {}).setdefault(table, {})[column] = _encode(value)
+        with open(STATE_FILE + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(state, file, indent=2)
+        os.replace(STATE_FILE + '.tmp', STATE_FILE)
+
+#Track the high-water mark of one incremental load
+class TableWatermark:
+    """High-water mark of one table load
+
+    filters() adds a '<column>__gt' filter with the stored high-water mark, advance()
+    tracks the largest value of the loaded rows and commit() persists it once all rows
+    are stored. If disabled, filters are returned unchanged and nothing is persisted.
+    """
+
+    def __init__(self, db, table, column='Modified', enabled=True):
+        self.db = db
+        self.table = table
+        self.column = column
+        self.enabled = enabled
+        self.since = get_watermark(db, table, column) if enabled else None
+        self.candidate = None
+
+    def columns(self, columns):
+        if not self.enabled or self.column in columns:
+            return columns
+        return columns + [self.column]
+
+    def filters(self, kwargs):
+        if self.since is None:
+            return kwargs
+        return dict(kwargs, **{self.column + '__gt': self.since})
+
+    def advance(self, df):
+        if not self.enabled or len(df) == 0:
+            return
+        if self.column not in df.columns:
+            print("No watermark column", self.column, "in table", self.table)
+            return
+        value = df[self.column].max()
+        if self.candidate is None or value > self.candidate:
+            self.candidate = value
+
+    def commit(self, df=None):
+        if df is not None:
+            self.advance(df)
+        if self.candidate is not None:
+            set_watermark(self.db, self.table, self.column, self.candidate)
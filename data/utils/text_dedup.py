@@ -0,0 +1,47 @@
+import hashlib
+import os
+from langchain_core.documents import Document
+
+#Local file handing the owners of shared business texts from the text stage to the Business stage
+SHARED_TEXTS_FILE = os.getenv('SPP_SHARED_TEXTS_FILE', '.spp_shared_texts.parquet')
+
+#Hash of a text with runs of whitespace collapsed, texts differing only in spacing share it
+def content_hash(text):
+    return hashlib.sha1(" ".join(text.split()).encode('utf-8')).hexdigest()
+
+#Drop empty texts and collapse equal texts to the first cell holding them
+def dedup_texts(df, columns, key='ID'):
+    """Turns the text columns of a dataframe into one row per distinct non-empty text,
+    owned by the first cell holding it, e.g. equal SubmittedText and MotionText of a
+    business are chunked and embedded once
+
+    Parameters
+    ----------
+    df : Pandas dataframe
+        Rows with a key column and cleaned text columns
+    columns : list
+        Text columns
+    key : str
+        Key column of the owners, defaults to 'ID'
+
+    Returns
+    -------
+    tuple
+        Pandas dataframe of the distinct texts with the columns key, Name and Text, and
+        Pandas dataframe linking every further owner to the text it shares, with the
+        columns key, Name, Text_ID and Text_Name
+    """
+    cells = df.melt(id_vars=[key], value_vars=columns, var_name='Name', value_name='Text')
+    filled = cells['Text'].map(lambda text: isinstance(text, str) and text.strip() != '')
+    cells = cells[filled].assign(Text_Hash=lambda cells: cells['Text'].map(content_hash))
+    first = ~cells.duplicated('Text_Hash')
+    unique = cells[first]
+    owners = unique[['Text_Hash', key, 'Name']].rename(columns={key: 'Text_ID', 'Name': 'Text_Name'})
+    duplicates = cells[~first].merge(owners, on='Text_Hash')[[key, 'Name', 'Text_ID', 'Text_Name']]
+    print(f"Texts: {len(unique)} distinct, {len(duplicates)} duplicates and {int((~filled).sum())} empty skipped")
+    return unique[[key, 'Name', 'Text']], duplicates
+
+#Documents of the distinct texts with the key and column of their owner as metadata
+def text_documents(unique, key='ID'):
+    for value, name, text in zip(unique[key], unique['Name'], unique['Text']):
+        yield Document(page_content=text, metadata={key: value, 'Name': name})
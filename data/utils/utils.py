@@ -1,9 +1,34 @@
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
 
 #Load environment variables
 load_dotenv()
 
+#Patterns of clean_text, compiled once per process
+RE_TAGS = re.compile(r"<[^>]+>")
+RE_WSPACE = re.compile(r"\s+", re.IGNORECASE)
+RE_SPACE_AFTER_PUNKT = re.compile(r"(?<=[.,;:!?])(?=[A-Za-z])")
+RE_ASCII_PUNCTUATION = re.compile(r"[^A-Za-zÀ-ž,.!?ÄÖÜäöü0-9 ]", re.IGNORECASE)
+RE_SINGLECHAR_PUNCTUATION = re.compile(r"\b[A-Za-zÀ-ž,.!?ÄÖÜäöü0-9]\b", re.IGNORECASE)
+RE_ASCII = re.compile(r"[^A-Za-zÀ-ž ]", re.IGNORECASE)
+RE_SINGLECHAR = re.compile(r"\b[A-Za-zÀ-ž]\b", re.IGNORECASE)
+
+#Characters the patterns of clean_text keep, for the vectorized (RE2) patterns of clean_unique. RE2 has
+#no lookarounds and no IGNORECASE-equivalent ranges, so the classes list the kept characters exactly:
+#À-ž without × and ÷, which are kept but are no word characters, plus ſ, ẞ, the Kelvin and Angstrom sign
+ARROW_LETTERS = r"A-Za-zÀ-ÖØ-öø-ſ\x{1E9E}\x{212A}\x{212B}"
+ARROW_DIGITS = r"0-9"
+
+#Placeholders of removed single characters, counting as word respectively non-word character
+WORD_MARK = "\x01"
+NONWORD_MARK = "\x02"
+
 #Function for text cleaning
 def clean_text(text, keep_punctuation=False, ensure_whitespace_after_punctuation=True):
     """Cleans text by removing html tags, non ascii chars, digits and optionally punctuation
@@ -22,34 +47,127 @@ def clean_text(text, keep_punctuation=False, ensure_whitespace_after_punctuation
     str
         The cleaned text
     """
-    import re
-    RE_TAGS = re.compile(r"<[^>]+>")
-    RE_WSPACE = re.compile(r"\s+", re.IGNORECASE)
-    
     # remove any html tags (< /br> often found)
-    text = re.sub(RE_TAGS, " ", text)
+    text = RE_TAGS.sub(" ", text)
     
     if ensure_whitespace_after_punctuation:
-        RE_SPACE_AFTER_PUNKT = re.compile(r"(?<=[.,;:!?])(?=[A-Za-z])")
-        text = re.sub(RE_SPACE_AFTER_PUNKT, " ", text)
+        text = RE_SPACE_AFTER_PUNKT.sub(" ", text)
     
     if keep_punctuation:
-        RE_ASCII_PUNCTUATION = re.compile(r"[^A-Za-zÀ-ž,.!?ÄÖÜäöü0-9 ]", re.IGNORECASE)
-        RE_SINGLECHAR_PUNCTUATION = re.compile(r"\b[A-Za-zÀ-ž,.!?ÄÖÜäöü0-9]\b", re.IGNORECASE)
-    
         # keep only ASCII + European Chars and whitespace, no digits, keep punctuation
-        text = re.sub(RE_ASCII_PUNCTUATION, " ", text)
+        text = RE_ASCII_PUNCTUATION.sub(" ", text)
         # convert all whitespaces (tabs etc.) to single wspace, keep punctuation
-        text = re.sub(RE_SINGLECHAR_PUNCTUATION, " ", text)
+        text = RE_SINGLECHAR_PUNCTUATION.sub(" ", text)
     else:
-        RE_ASCII = re.compile(r"[^A-Za-zÀ-ž ]", re.IGNORECASE)
-        RE_SINGLECHAR = re.compile(r"\b[A-Za-zÀ-ž]\b", re.IGNORECASE)
-        
         # keep only ASCII + European Chars and whitespace, no digits, no punctuation
-        text = re.sub(RE_ASCII, " ", text)
+        text = RE_ASCII.sub(" ", text)
         # convert all whitespaces (tabs etc.) to single wspace
-        text = re.sub(RE_SINGLECHAR, " ", text)     
+        text = RE_SINGLECHAR.sub(" ", text)
     
-    text = re.sub(RE_WSPACE, " ", text)  
+    text = RE_WSPACE.sub(" ", text)
     return text
 
+
+#Number of worker processes that can be forked safely, None while other threads are running
+def fork_safe_workers(workers):
+    """Returns workers only if this is the only thread of the process. Forking while
+    other threads, e.g. the stages of utils/scheduler.py or driver connections, hold locks
+    can deadlock the child, and spawning would re-run the unguarded loader scripts
+
+    Parameters
+    ----------
+    workers : int
+        Requested number of worker processes
+
+    Returns
+    -------
+    int
+        workers, or None to run in this process
+    """
+    if threading.current_thread() is threading.main_thread() and threading.active_count() == 1:
+        return workers
+    return None
+
+#Clean a list of distinct texts with vectorized string operations, same result as clean_text per text
+def clean_unique(texts, keep_punctuation=False, ensure_whitespace_after_punctuation=True):
+    """Runs the steps of clean_text as pyarrow string operations over all texts at once.
+    Runs of removed characters and whitespace become one space right away. A single
+    character is replaced by a placeholder of the same word class, so its neighbours
+    still see the boundary; a match consumes its neighbours, the second pass finds the
+    characters next to a match
+
+    Parameters
+    ----------
+    texts : list
+        The texts to clean, without missing values
+    keep_punctuation : bool
+        Defines if punctuation should be kept
+    ensure_whitespace_after_punctuation : bool
+        Defines if a whitespace should be added after punctuation (.,;:!?) if one is missing
+
+    Returns
+    -------
+    list
+        The cleaned texts
+    """
+    word = ARROW_DIGITS + ARROW_LETTERS if keep_punctuation else ARROW_LETTERS
+    single = "!,.?×÷" if keep_punctuation else "×÷"
+    series = pd.Series(texts, dtype='string[pyarrow]').str.replace(r"<[^>]+>", " ", regex=True)
+    if ensure_whitespace_after_punctuation:
+        series = series.str.replace(r"([.,;:!?])([A-Za-z])", r"\1 \2", regex=True)
+    series = series.str.replace(f"[^{word}{single}]*[^ {word}{single}][^{word}{single}]*|  +", " ", regex=True)
+    for _ in range(2):
+        series = series.str.replace(f"(^|[^{word}{WORD_MARK}])([{word}])([^{word}{WORD_MARK}]|$)",
+                                    f"\\1{WORD_MARK}\\3", regex=True)
+    for _ in range(2):
+        series = series.str.replace(f"([{word}{WORD_MARK}])([{single}])([{word}{WORD_MARK}])",
+                                    f"\\1{NONWORD_MARK}\\3", regex=True)
+    marks = WORD_MARK + NONWORD_MARK
+    return series.str.replace(f"[ {marks}]*[{marks}][ {marks}]*", " ", regex=True).tolist()
+
+#Function for cleaning a whole column of texts at once
+def clean_texts(texts, keep_punctuation=False, ensure_whitespace_after_punctuation=True,
+                workers=None, min_shard=10000):
+    """Cleans texts with the same result as clean_text per text, but cleans every
+    distinct text only once with vectorized string operations (clean_unique) and
+    optionally shards large corpora over worker threads, which run in parallel as the
+    pyarrow string operations release the GIL. Missing values are kept instead of failing
+
+    Parameters
+    ----------
+    texts : Pandas series or list
+        The texts to clean
+    keep_punctuation : bool
+        Defines if punctuation should be kept
+    ensure_whitespace_after_punctuation : bool
+        Defines if a whitespace should be added after punctuation (.,;:!?) if one is missing
+    workers : int
+        Optional number of worker threads, defaults to cleaning in the calling thread
+    min_shard : int
+        Least number of distinct texts per worker thread
+
+    Returns
+    -------
+    Pandas series
+        The cleaned texts with the index of the input
+    """
+    series = texts if isinstance(texts, pd.Series) else pd.Series(texts, dtype=object)
+    values = series.tolist()
+    unique = list(dict.fromkeys(value for value in values if isinstance(value, str)))
+    clean = partial(clean_unique, keep_punctuation=keep_punctuation,
+                    ensure_whitespace_after_punctuation=ensure_whitespace_after_punctuation)
+    shards = min(workers or 1, len(unique) // min_shard)
+    if shards > 1:
+        with ThreadPoolExecutor(shards) as pool:
+            cleaned = [text for shard in pool.map(clean, np.array_split(np.array(unique, dtype=object), shards)) for text in shard]
+    else:
+        cleaned = clean(unique)
+    cleaned = dict(zip(unique, cleaned))
+    return pd.Series([cleaned.get(value, value) if isinstance(value, str) else value for value in values],
+                     index=series.index, dtype=object)
+
+#Clean text columns of a dataframe in place
+def clean_columns(df, columns, **kwargs):
+    for column in columns:
+        df[column] = clean_texts(df[column], **kwargs)
+    return df
@@ -0,0 +1,56 @@
+import os
+import threading
+from langchain_community.vectorstores import Neo4jVector
+from langchain_openai import OpenAIEmbeddings
+from .langchain_graph import shared_graph
+from .embedding_cache import CachedEmbeddings, shared_cache
+
+#Vector stores created in this process, keyed by database and index name
+_stores = {}
+_stores_lock = threading.Lock()
+
+#Embed and store documents as Text nodes in a Neo4j vector index
+def store_documents(documents, db, index_name):
+    """Stores documents in the vector index of the specified database. The vector store
+    is created once per database and index and runs on the shared driver, later calls
+    only add documents to it. Texts embedded before are read from the embedding cache
+
+    Parameters
+    ----------
+    documents : list
+        List of Langchain documents
+    db : str
+        Name of the database
+    index_name : str
+        Name of the vector index
+
+    Returns
+    -------
+    Neo4jVector
+        The vector store
+    """
+    # Neo4j DBMS credentials
+    url = os.getenv('NEO4J_url')
+    username = os.getenv('NEO4J_user')
+    password = os.getenv('NEO4J_pwd')
+
+    with _stores_lock:
+        store = _stores.get((db, index_name))
+        if store is None:
+            # Instantiate Neo4j vector from documents on the shared driver
+            store = Neo4jVector.from_documents(
+                documents,
+                CachedEmbeddings(OpenAIEmbeddings(openai_api_key=os.getenv('OPENAI_API_KEY'))),
+                graph=shared_graph(url, username, password, db, refresh_schema=False),
+                index_name=index_name,
+                node_label="Text",
+                text_node_property="info",
+                embedding_node_property="vector",
+                create_id_index=True
+            )
+            _stores[(db, index_name)] = store
+            print("Embedding cache:", shared_cache().stats())
+            return store
+    store.add_documents(documents)
+    print("Embedding cache:", shared_cache().stats())
+    return store
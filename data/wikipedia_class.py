@@ -1,9 +1,8 @@
 import os
 from utils.neo4j_python_connection import Neo4jConnection
 from langchain_community.document_loaders import WikipediaLoader
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.vectorstores import Neo4jVector
-from langchain_openai import OpenAIEmbeddings
+from utils.chunking import iter_chunks
+from utils.vector_store import store_documents
 
 #Initiate Neo4j-database connection
 conn = Neo4jConnection(uri=os.getenv('NEO4J_url'), 
@@ -14,6 +13,7 @@ conn = Neo4jConnection(uri=os.getenv('NEO4J_url'),
 def get_person_names(db):
     query = '''
             MATCH (p:Parlamentarier)
+            WHERE p.Personennummer IS NOT NULL
             RETURN p.Personennummer, p.Name
             '''       
     result = conn.query_values(query, db=db)
@@ -25,6 +25,7 @@ def get_person_names(db):
 def get_department_names(db):
     query = '''
             MATCH (d:Departement)
+            WHERE d.Departementsnummer IS NOT NULL
             RETURN d.Departementsnummer, d.Name
             '''       
     result = conn.query_values(query, db=db)
@@ -37,6 +38,7 @@ def get_department_names(db):
 def get_rat_names(db):
     query = '''
             MATCH (r:Rat)
+            WHERE r.Ratnummer IS NOT NULL
             RETURN r.Ratnummer, r.Name
             '''       
     result = conn.query_values(query, db=db)
@@ -50,6 +52,7 @@ def get_rat_names(db):
 def get_party_names(db):
     query = '''
             MATCH (p:Partei)
+            WHERE p.Parteinummer IS NOT NULL
             RETURN p.Parteinummer, p.Name
             '''       
     result = conn.query_values(query, db=db)
@@ -62,6 +65,7 @@ def get_party_names(db):
 def get_canton_names(db):
     query = '''
             MATCH (k:Kanton)
+            WHERE k.Kantonsnummer IS NOT NULL
             RETURN k.Kantonsnummer, k.Name
             '''       
     result = conn.query_values(query, db=db)
@@ -87,12 +91,8 @@ def process_wikipedia_data(raw_documents):
     """
     Process (chunk and clean) the loaded Wikipedia data.
     """
-    # Define chunking strategy
-    text_splitter = CharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=512, chunk_overlap=20
-    )
-    # Chunk the document
-    documents = text_splitter.split_documents(raw_documents)
+    # Chunk the document with the shared chunking strategy
+    documents = list(iter_chunks(raw_documents))
 
     # Remove summary from metadata
     for d in documents:
@@ -105,28 +105,7 @@ def store_data_in_neo4j(documents, database):
     """
     Store and index text with Neo4j.
     """
-    # Neo4j credentials
-    url=os.getenv('NEO4J_url')
-    username = os.getenv('NEO4J_user')
-    password = os.getenv('NEO4J_pwd')
-
-    # OpenAI credentials
-    openai_api_secret_key = os.getenv('OPENAI_API_KEY')
-
-    # Instantiate Neo4j vector from documents
-    Neo4jVector.from_documents(
-        documents,
-        OpenAIEmbeddings(openai_api_key=openai_api_secret_key),
-        database=database,
-        url=url,
-        username=username,
-        password=password,
-        index_name="wikipedia",  
-        node_label="Text", 
-        text_node_property="info", 
-        embedding_node_property="vector",
-        create_id_index=True 
-    )
+    store_documents(documents, database, index_name="wikipedia")
 
 #Load, embed and store wikipedia data in Neo4j-database
 def load_embed_store_wiki(query, database):
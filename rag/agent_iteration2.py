@@ -4,6 +4,7 @@ from langchain.tools import Tool
 from langchain.chains.conversation.memory import ConversationBufferWindowMemory
 from rag.tools.vector import kg_qa
 from rag.tools.vector_local import kg_qa_local
+from rag.tools.vector_async import run_vector_searches
 from rag.tools.cypher_finetuned import cypher_qa
 import pandas as pd
 from rag.llm import llm
@@ -52,6 +53,13 @@ tools = [
         return_direct=False,
         return_intermediate_steps=True
     ),
+    Tool.from_function(
+        name="Global and Local Vector Search",  
+        description="Durchsucht die globale und die lokale Vektorsuche gleichzeitig und gibt die gefundenen Textstellen zur Schweizer Politik zurück", 
+        func = run_vector_searches, 
+        return_direct=False,
+        return_intermediate_steps=True
+    ),
 ]
 
 #Initiate conversation memory for langchain agent
@@ -1,10 +1,10 @@
 import streamlit as st
-from langchain_community.graphs import Neo4jGraph
+from data.utils.langchain_graph import shared_graph
 
-#Initiate Neo4j-Graph instance
-graph = Neo4jGraph(
-    url=st.secrets["NEO4J_URI"],
-    username=st.secrets["NEO4J_USERNAME"],
-    password=st.secrets["NEO4J_PASSWORD"],
+#Initiate Neo4j-Graph instance on the process-wide driver, which is shared with the vector search tools
+graph = shared_graph(
+    st.secrets["NEO4J_URI"],
+    st.secrets["NEO4J_USERNAME"],
+    st.secrets["NEO4J_PASSWORD"],
     database="swissparlgraph"
 )
@@ -2,6 +2,7 @@ import os
 import streamlit as st
 from langchain_openai import ChatOpenAI
 from langchain_openai import OpenAIEmbeddings
+from data.utils.embedding_cache import CachedEmbeddings
 
 #Initiate LLM model
 llm = ChatOpenAI(
@@ -10,7 +11,7 @@ llm = ChatOpenAI(
     max_tokens=3000,
 )
 
-#Initiate embedding model
-embeddings = OpenAIEmbeddings(
+#Initiate embedding model, repeated questions are embedded from the shared embedding cache
+embeddings = CachedEmbeddings(OpenAIEmbeddings(
     openai_api_key=st.secrets["OPENAI_API_KEY"]
-)
+))
@@ -0,0 +1,53 @@
+import asyncio
+import streamlit as st
+from rag.llm import embeddings
+from data.utils.neo4j_python_connection import AsyncNeo4jConnection
+
+#Vector index lookups of the global (Geschäfte) and the local (Chunks) search, same indexes as vector.py and vector_local.py
+QUERY_GLOBAL = """
+CALL db.index.vector.queryNodes('geschäfte', $k, $vector) YIELD node, score
+RETURN node.info AS text, score, node.title AS title, node.source AS source
+"""
+
+QUERY_LOCAL = """
+CALL db.index.vector.queryNodes('local', $k, $vector) YIELD node, score
+RETURN node.info AS text, score, node.title AS title, node.source AS source
+"""
+
+#Run both vector lookups concurrently on one event loop
+async def vector_searches_async(question, k=4):
+    """Embeds the question once and queries the global and the local vector index at the
+    same time instead of one after another
+
+    Parameters
+    ----------
+    question : str
+        Question of the user
+    k : int
+        Number of results per index, defaults to 4
+
+    Returns
+    -------
+    tuple
+        Records of the global and of the local search with text, score, title and source
+    """
+    vector = await asyncio.to_thread(embeddings.embed_query, question)
+    aconn = AsyncNeo4jConnection(uri=st.secrets["NEO4J_URI"],
+                                 user=st.secrets["NEO4J_USERNAME"],
+                                 pwd=st.secrets["NEO4J_PASSWORD"])
+    try:
+        return await asyncio.gather(
+            aconn.query(QUERY_GLOBAL, {'k': k, 'vector': vector}, db="swissparlgraph2"),
+            aconn.query(QUERY_LOCAL, {'k': k, 'vector': vector}, db="vector")
+        )
+    finally:
+        await aconn.close()
+
+#Function for the agent tool, returns the results of both searches as context
+def run_vector_searches(question, k=4):
+    global_records, local_records = asyncio.run(vector_searches_async(question, k))
+    sections = []
+    for name, records in (("Globale Suche", global_records), ("Lokale Suche", local_records)):
+        sections.append(name + ":\n" + "\n".join(f"- {record['title']} ({record['source']}): {record['text']}"
+                                                for record in records))
+    return "\n\n".join(sections)
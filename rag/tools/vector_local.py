@@ -2,18 +2,17 @@ import streamlit as st
 from langchain_community.vectorstores.neo4j_vector import Neo4jVector
 from rag.llm import llm, embeddings
 from langchain.chains import RetrievalQA
+from data.utils.langchain_graph import shared_graph
 
-#Initiate Neo4j-Vectorindex from existing database index
+#Initiate Neo4j-Vectorindex from existing database index on the process-wide driver, which is shared with the graph
 neo4jvector = Neo4jVector.from_existing_index(
     embeddings,                              
-    url=st.secrets["NEO4J_URI"],             
-    username=st.secrets["NEO4J_USERNAME"],   
-    password=st.secrets["NEO4J_PASSWORD"],   
     index_name="local",                
     node_label="Chunk",                     
     text_node_property="info",              
     embedding_node_property="vector", 
-    database="vector",
+    graph=shared_graph(st.secrets["NEO4J_URI"], st.secrets["NEO4J_USERNAME"], st.secrets["NEO4J_PASSWORD"],
+                       database="vector", refresh_schema=False),
     retrieval_query="""
 RETURN
     node {.*, vector: NULL} AS text,
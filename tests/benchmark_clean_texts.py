@@ -0,0 +1,41 @@
+import random
+import sys
+import time
+from pathlib import Path
+
+#Import the helpers as the loader scripts do, with data/ on the path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'data'))
+
+from test_clean_texts import SAMPLES, random_texts
+from utils.utils import clean_text, clean_texts
+
+#Compare the throughput of clean_texts with clean_text per text, on random texts and on distinct
+#prose-like texts, the latter without duplicates so the speed-up comes from the vectorized operations only
+#Usage: python tests/benchmark_clean_texts.py [number of texts] [worker threads]
+
+WORDS = ("Der Bundesrat wird beauftragt, die Grundlagen für eine Revision des Gesetzes vorzulegen. "
+         "Die Kommission beantragt mit 14 zu 9 Stimmen, der Motion zuzustimmen; eine Minderheit "
+         "(Müller, Rösti) lehnt sie ab. <p>Siehe Art. 3 Abs. 2 BV &amp; die Botschaft vom 12.03.2021.</p> "
+         "Le Conseil fédéral est chargé d'élaborer un projet! Warum? Kosten: 1,2 Mrd. Fr. × 2 ÷ 3").split(" ")
+
+#Distinct texts of 40 to 120 words taken from a parliamentary vocabulary
+def prose_texts(count, seed=0):
+    rng = random.Random(seed)
+    return [f"{index} " + " ".join(rng.choices(WORDS, k=rng.randint(40, 120))) for index in range(count)]
+
+def fastest(function, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 60000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    for name, texts in (("random", (SAMPLES + random_texts(count))[:count]), ("prose", prose_texts(count))):
+        per_text = fastest(lambda: [clean_text(text, keep_punctuation=True) for text in texts])
+        batch = fastest(lambda: clean_texts(texts, keep_punctuation=True, workers=workers))
+        print(f"{name} clean_text:  {len(texts) / per_text:,.0f} texts/s")
+        print(f"{name} clean_texts: {len(texts) / batch:,.0f} texts/s ({per_text / batch:.1f}x)")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+#Import the helpers as the loader scripts do, with data/ on the path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'data'))
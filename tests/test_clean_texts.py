@@ -0,0 +1,53 @@
+import itertools
+import math
+import random
+import pandas as pd
+import pytest
+from utils.utils import clean_text, clean_texts
+
+OPTIONS = list(itertools.product([False, True], [False, True]))
+
+#Texts with markup, umlauts, digits, punctuation and characters that only match case-insensitively
+SAMPLES = [
+    "",
+    " ",
+    "<p>Der Bundesrat wird beauftragt.Er soll</p><br/>bis 2025 berichten!",
+    "Motion 23.4011: Änderung des ZGB, Art. 5 a b c",
+    "Nr.5;x:y,z?Ü.ä",
+    "tab\tnew\nline  spaces",
+    "ſ K ﬀ é À ž",
+    "<a href='x'>Link</a> - \"Zitat\" (Klammer)",
+]
+
+#Characters at the edges of the character classes and word boundaries, including the placeholders of clean_unique
+BOUNDARY_ALPHABET = list("a Z0.,;:!?×÷ſ<>\tä\x01\x02") + ['\u212a', '\u1e9e', '\n', 'ﬀ']
+
+def random_texts(count=2000, seed=1):
+    alphabet = list("abcXYZ äöüÄÖÜéſKÀž.,;:!? <>/br\t\n0123456789-'\"ﬀ")
+    rng = random.Random(seed)
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 80))) for _ in range(count)]
+
+@pytest.mark.parametrize("keep_punctuation, ensure_whitespace", OPTIONS)
+def test_clean_texts_matches_clean_text(keep_punctuation, ensure_whitespace):
+    texts = SAMPLES + random_texts()
+    expected = [clean_text(text, keep_punctuation, ensure_whitespace) for text in texts]
+    actual = clean_texts(texts, keep_punctuation, ensure_whitespace).tolist()
+    assert actual == expected
+
+@pytest.mark.parametrize("keep_punctuation, ensure_whitespace", OPTIONS)
+def test_clean_texts_keeps_missing_values(keep_punctuation, ensure_whitespace):
+    series = pd.Series(["a.b", None, "a.b", float('nan'), "<b>x</b>"], index=[5, 6, 7, 8, 9])
+    result = clean_texts(series, keep_punctuation, ensure_whitespace)
+    assert list(result.index) == [5, 6, 7, 8, 9]
+    for value, cleaned in zip(series, result):
+        if isinstance(value, str):
+            assert cleaned == clean_text(value, keep_punctuation, ensure_whitespace)
+        else:
+            assert cleaned is None or (isinstance(cleaned, float) and math.isnan(cleaned))
+
+@pytest.mark.parametrize("keep_punctuation, ensure_whitespace", OPTIONS)
+def test_clean_texts_matches_clean_text_per_character(keep_punctuation, ensure_whitespace):
+    texts = [chr(code) for code in range(0x10000) if not 0xD800 <= code < 0xE000]
+    texts += [''.join(chars) for size in (2, 3) for chars in itertools.product(BOUNDARY_ALPHABET, repeat=size)]
+    expected = [clean_text(text, keep_punctuation, ensure_whitespace) for text in texts]
+    assert clean_texts(texts, keep_punctuation, ensure_whitespace).tolist() == expected
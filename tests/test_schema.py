@@ -0,0 +1,25 @@
+import pytest
+from utils.schema import check_plan, plannable
+
+#Plans as returned by EXPLAIN, reduced to the operator types
+def plan(operator, *children):
+    return {'operatorType': operator + '@neo4j', 'children': list(children)}
+
+def test_label_scan_fails():
+    with pytest.raises(ValueError, match='NodeByLabelScan'):
+        check_plan("MATCH (r:Rat) RETURN r", plan('ProduceResults', plan('NodeByLabelScan')))
+
+def test_cartesian_product_of_key_lookups_passes():
+    check_plan("UNWIND $rows AS row MATCH (a {ID: row.a}) MATCH (b {ID: row.b}) MERGE (a)-[:R]->(b)",
+               plan('Merge', plan('CartesianProduct', plan('NodeUniqueIndexSeek', plan('Unwind')),
+                                  plan('NodeUniqueIndexSeek', plan('Argument')))))
+
+def test_cartesian_product_over_a_scan_fails():
+    with pytest.raises(ValueError, match='CartesianProduct'):
+        check_plan("MATCH (a {ID: 1}) MATCH (b:Thema) MERGE (a)-[:R]->(b)",
+                   plan('Merge', plan('CartesianProduct', plan('NodeUniqueIndexSeek'), plan('NodeIndexScan'))))
+
+def test_schema_statements_are_not_planned():
+    assert not plannable("CREATE CONSTRAINT `Rat_Ratnummer` IF NOT EXISTS FOR (n:`Rat`) REQUIRE n.`Ratnummer` IS UNIQUE")
+    assert not plannable("SHOW INDEXES")
+    assert plannable("MATCH (g:Geschäft) WHERE g.Geschäftsnummer IS NOT NULL RETURN g.Geschäftsnummer")